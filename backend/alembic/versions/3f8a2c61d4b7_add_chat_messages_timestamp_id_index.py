@@ -0,0 +1,27 @@
+"""add (timestamp, id) index to chat_messages
+
+Revision ID: 3f8a2c61d4b7
+Revises: cb3c9767aa9e
+Create Date: 2026-10-18 09:12:40.512331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a2c61d4b7'
+down_revision: Union[str, None] = 'cb3c9767aa9e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chat_messages_timestamp_id', 'chat_messages', ['timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_messages_timestamp_id', table_name='chat_messages')
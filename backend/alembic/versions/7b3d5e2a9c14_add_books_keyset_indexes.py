@@ -0,0 +1,40 @@
+"""add keyset pagination indexes to books
+
+Revision ID: 7b3d5e2a9c14
+Revises: e4b1c7a9f350
+Create Date: 2026-10-18 13:40:12.672801
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3d5e2a9c14'
+down_revision: Union[str, None] = 'e4b1c7a9f350'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset comparisons skip NULLs, so downloads always have a value
+    op.execute("UPDATE books SET num_of_downloads = 0 WHERE num_of_downloads IS NULL")
+    op.alter_column('books', 'num_of_downloads',
+               existing_type=sa.INTEGER(),
+               server_default='0',
+               nullable=False)
+    op.create_index('ix_books_title_id', 'books', ['title', 'id'], unique=False)
+    op.create_index('ix_books_num_of_downloads_id', 'books', ['num_of_downloads', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_num_of_downloads_id', table_name='books')
+    op.drop_index('ix_books_title_id', table_name='books')
+    op.alter_column('books', 'num_of_downloads',
+               existing_type=sa.INTEGER(),
+               server_default=None,
+               nullable=True)
@@ -0,0 +1,29 @@
+"""add conversation indexes to private_chat_messages
+
+Revision ID: 8d41e0b9c2fa
+Revises: 3f8a2c61d4b7
+Create Date: 2026-10-18 11:37:05.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e0b9c2fa'
+down_revision: Union[str, None] = '3f8a2c61d4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_private_chat_messages_sender_receiver_timestamp', 'private_chat_messages', ['sender_id', 'receiver_id', 'timestamp'], unique=False)
+    op.create_index('ix_private_chat_messages_receiver_sender_timestamp', 'private_chat_messages', ['receiver_id', 'sender_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_private_chat_messages_receiver_sender_timestamp', table_name='private_chat_messages')
+    op.drop_index('ix_private_chat_messages_sender_receiver_timestamp', table_name='private_chat_messages')
@@ -0,0 +1,27 @@
+"""add user_id/timestamp index to chat_messages
+
+Revision ID: a2e6f4d8c1b9
+Revises: 5c7e9a13b2d0
+Create Date: 2026-10-18 12:31:18.550392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2e6f4d8c1b9'
+down_revision: Union[str, None] = '5c7e9a13b2d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chat_messages_user_id_timestamp', 'chat_messages', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_messages_user_id_timestamp', table_name='chat_messages')
@@ -0,0 +1,51 @@
+"""add book_stats
+
+Revision ID: c9f2a6e1d8b3
+Revises: 7b3d5e2a9c14
+Create Date: 2026-10-18 14:15:53.209671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f2a6e1d8b3'
+down_revision: Union[str, None] = '7b3d5e2a9c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_stats',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('review_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('favourite_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    # Same numbers as rebuild_book_stats.py computes
+    op.execute("""
+        INSERT INTO book_stats (book_id, rating_sum, rating_count, review_count, favourite_count)
+        SELECT books.id,
+               coalesce(r.rating_sum, 0), coalesce(r.rating_count, 0), coalesce(r.review_count, 0),
+               coalesce(f.favourite_count, 0)
+        FROM books
+        LEFT JOIN (
+            SELECT book_id, sum(rating) AS rating_sum, count(rating) AS rating_count, count(id) AS review_count
+            FROM review GROUP BY book_id
+        ) r ON r.book_id = books.id
+        LEFT JOIN (
+            SELECT book_id, count(*) AS favourite_count FROM book_favourites GROUP BY book_id
+        ) f ON f.book_id = books.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_stats')
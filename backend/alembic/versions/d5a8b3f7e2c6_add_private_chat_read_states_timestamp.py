@@ -0,0 +1,29 @@
+"""add last_read_timestamp to private_chat_read_states
+
+Revision ID: d5a8b3f7e2c6
+Revises: c9f2a6e1d8b3
+Create Date: 2026-10-18 16:02:27.841903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8b3f7e2c6'
+down_revision: Union[str, None] = 'c9f2a6e1d8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing watermarks stay NULL and are rewritten the next time the conversation is opened
+    op.add_column('private_chat_read_states', sa.Column('last_read_timestamp', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('private_chat_read_states', 'last_read_timestamp')
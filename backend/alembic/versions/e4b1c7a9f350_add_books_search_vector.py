@@ -0,0 +1,40 @@
+"""add search_vector to books
+
+Revision ID: e4b1c7a9f350
+Revises: a2e6f4d8c1b9
+Create Date: 2026-10-18 13:02:27.114930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b1c7a9f350'
+down_revision: Union[str, None] = 'a2e6f4d8c1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    # Same expression as services/book_search.py
+    op.execute("""
+        UPDATE books SET search_vector =
+            setweight(to_tsvector('simple', coalesce(books.title, '')), 'A') ||
+            setweight(to_tsvector('simple', concat_ws(' ', users.username, users.first_name, users.last_name)), 'B') ||
+            setweight(to_tsvector('simple', coalesce(books.description, '')), 'C')
+        FROM users
+        WHERE users.id = books.author_id
+    """)
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_search_vector', table_name='books', postgresql_using='gin')
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the chatbot intent classifier: per-query cost of the
+compiled token matcher against the old substring scan as patterns grow
+"""
+
+import sys
+import os
+import timeit
+
+# Add the parent directory to the path so we can import from services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.intent_classifier import IntentClassifier
+
+QUERIES = [
+    "How do I search for books by my favourite author?",
+    "I forgot my password and can't login to my account",
+    "Where can I write a review and rate a book?",
+    "Is there a community forum or book club I can join?",
+    "I found a bug on the platform, who do I contact for help?",
+    "What does Bookify do?",
+]
+
+BASE_PATTERNS = {
+    'search': ['search', 'find', 'look', 'discover', 'browse', 'explore', 'locate', 'book', 'books', 'title', 'author', 'genre'],
+    'account': ['account', 'profile', 'register', 'sign up', 'login', 'password', 'email', 'verification', 'settings'],
+    'reviews': ['review', 'rating', 'rate', 'stars', 'feedback', 'opinion', 'comment', 'recommend'],
+    'features': ['features', 'capabilities', 'functions', 'tools', 'options', 'services', 'platform'],
+    'community': ['community', 'forum', 'discussion', 'social', 'friends', 'follow', 'group', 'club', 'connect'],
+    'support': ['help', 'support', 'problem', 'issue', 'trouble', 'error', 'bug', 'assistance', 'contact'],
+}
+
+
+def substring_scan(patterns, query):
+    """The previous _detect_intent implementation"""
+    query_lower = query.lower()
+    intent_scores = {}
+    for intent, intent_patterns in patterns.items():
+        score = sum(1 for pattern in intent_patterns if pattern in query_lower)
+        if score > 0:
+            intent_scores[intent] = score
+    if intent_scores:
+        return max(intent_scores, key=intent_scores.get)
+    return 'general'
+
+
+def with_extra_patterns(extra):
+    """Base patterns plus ``extra`` synthetic words spread over the intents"""
+    patterns = {intent: list(words) for intent, words in BASE_PATTERNS.items()}
+    intents = list(patterns)
+    for i in range(extra):
+        patterns[intents[i % len(intents)]].append(f"synthetic{i}")
+    return patterns
+
+
+def benchmark():
+    print("📊 Intent classifier micro-benchmark (microseconds per query)")
+    print(f"{'patterns':>10} {'substring scan':>16} {'token matcher':>15}")
+
+    for extra in (0, 100, 1_000, 10_000):
+        patterns = with_extra_patterns(extra)
+        classifier = IntentClassifier(patterns)
+        runs = 200
+
+        scan = timeit.timeit(lambda: [substring_scan(patterns, q) for q in QUERIES], number=runs)
+        matcher = timeit.timeit(lambda: [classifier.classify(q) for q in QUERIES], number=runs)
+
+        per_query = runs * len(QUERIES)
+        print(f"{classifier.pattern_count:>10} {scan / per_query * 1e6:>16.1f} {matcher / per_query * 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    benchmark()
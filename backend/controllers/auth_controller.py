@@ -13,6 +13,7 @@ from services.auth_service import (
 )
 from sqlalchemy import select
 from database import get_db
+from services.admin_metrics_service import admin_metrics
 from fastapi.responses import JSONResponse
 
 router = APIRouter(
@@ -55,6 +56,7 @@ async def create_user(create_user_request: CreateUserRequest, db: AsyncSession =
         await db.commit()
         await db.refresh(new_user)
         await db.refresh(new_user, attribute_names=["roles"])
+        admin_metrics.mark_stale()
         return {
             "id": new_user.id,
             "username": new_user.username,
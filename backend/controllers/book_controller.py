@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, Form, status, File, UploadFile, Request, HTTPException
+from fastapi import APIRouter, Depends, Query, Form, status, File, UploadFile, Request, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from sqlalchemy.orm import Session, selectinload
@@ -7,6 +7,9 @@ from sqlalchemy.future import select
 from schemas import BookCreate, BookDisplay, BookAverageRating, ReviewDisplay
 from database import get_db, get_async_db
 from services import book_service
+from repositories import book_stats_repository
+from services.admin_metrics_service import admin_metrics
+from services.author_analytics_service import author_analytics
 from schemas.book import AdminBookMetricsSummary, BookAnalytics, BookResponseSchema
 from services.auth_service import *
 from services.book_service import *
@@ -19,43 +22,34 @@ async def create_book(book_data: BookCreate, db: AsyncSession = Depends(get_db))
 
 @router.get("/", response_model=List[BookDisplay])
 async def get_all_books(
+    response: Response,
     genre: Optional[List[str]] = Query(None),
     author: Optional[str] = None,
     keywords: Optional[str] = None,
-    sort: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(title|downloads|author|rating)$"),
     direction: Optional[str] = "asc",
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(book_service.BOOK_PAGE_SIZE, ge=1, le=book_service.MAX_BOOK_PAGE_SIZE),
+    with_total: bool = Query(False, description="Add an estimated X-Total-Count-Estimate header"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
     db: AsyncSession = Depends(get_db)
 ):
-    return await book_service.get_all_books_service(db, genre, author, keywords, sort, direction)
+    books, next_cursor, total = await book_service.get_all_books_service(
+        db, genre, author, keywords, sort, direction, cursor, limit, with_total, min_rating
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count-Estimate"] = str(total)
+    return books
 
 @router.get("/authored", response_model=list[BookAnalytics])
 async def get_authored_books(
     db: AsyncSession = Depends(get_async_db),
     token_user: dict = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Book)
-        .options(selectinload(Book.author).selectinload(User.roles))
-        .where(Book.author_id == token_user["id"])
-    )
-    books = result.scalars().all()
-
-    enriched = []
-    for book in books:
-        avg = await get_average_book_rating(book.id, db)
-        reviews = await get_review_count(book.id, db)
-        favs = await get_favourite_count(book.id, db)
-
-        enriched.append(BookAnalytics(
-        id=book.id,
-        title=book.title,
-        num_of_downloads=book.num_of_downloads,
-        average_rating=avg,
-        review_count=reviews,
-        favourite_count=favs
-    ))
-
-    return enriched
+    metrics = await author_analytics.get_book_metrics(token_user["id"], db)
+    return [BookAnalytics(**book) for book in metrics]
 
 @router.get("/favourites")
 async def get_favourites(
@@ -68,6 +62,29 @@ async def get_favourites(
     user = result.scalar_one()
     return [book.id for book in user.favourite_books]
 
+@router.get("/favourites/books", response_model=List[BookDisplay])
+async def get_favourite_books(
+    response: Response,
+    genre: Optional[List[str]] = Query(None),
+    author: Optional[str] = None,
+    keywords: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(title|downloads|author|rating)$"),
+    direction: Optional[str] = "asc",
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(book_service.BOOK_PAGE_SIZE, ge=1, le=book_service.MAX_BOOK_PAGE_SIZE),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_for_favourites)
+):
+    """The current user's favourite books, paged like GET /books/"""
+    books, next_cursor, _ = await book_service.get_all_books_service(
+        db, genre, author, keywords, sort, direction, cursor, limit,
+        min_rating=min_rating, favourited_by=current_user.id
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return books
+
 @router.post("/favourites/{book_id}")
 async def add_to_favourites(
     book_id: int,
@@ -88,7 +105,9 @@ async def add_to_favourites(
         return {"detail": "Book already in favourites"}
 
     user.favourite_books.append(book)
+    await book_stats_repository.apply_delta(db, book_id, favourite_count=1)
     await db.commit()
+    admin_metrics.mark_stale()
     return {"detail": "Book added to favourites"}
 
 @router.delete("/favourites/{book_id}")
@@ -111,7 +130,9 @@ async def remove_from_favourites(
         raise HTTPException(status_code=400, detail="Book not in favourites")
 
     user.favourite_books = [b for b in user.favourite_books if b.id != book_id]
+    await book_stats_repository.apply_delta(db, book_id, favourite_count=-1)
     await db.commit()
+    admin_metrics.mark_stale()
     return {"detail": "Book removed from favourites"}
 
 @router.get("/{book_id}", response_model=BookDisplay)
@@ -195,6 +216,7 @@ async def increment_download(book_id: int, db: AsyncSession = Depends(get_async_
     book.num_of_downloads += 1
     await db.commit()
     await db.refresh(book)
+    admin_metrics.mark_stale()
     return {"message": "Download count incremented", "num_of_downloads": book.num_of_downloads}
 
 @router.get("/{book_id}/review-stats")
@@ -218,30 +240,18 @@ async def get_book_summary(
     db: AsyncSession = Depends(get_async_db),
     token_user: dict = Depends(get_current_user)
 ):
-    author_id = token_user["id"]
-
-    result = await db.execute(select(Book).where(Book.author_id == author_id))
-    books = result.scalars().all()
-
-    summaries = []
-    for book in books:
-        review_count = await db.scalar(
-            select(func.count(Review.id)).where(Review.book_id == book.id)
-        )
-        favourite_count = await db.scalar(
-            select(func.count()).select_from(book_favourites).where(book_favourites.c.book_id == book.id)
-        )
-
-        summaries.append({
-            "id": book.id,
-            "title": book.title,
-            "num_of_downloads": book.num_of_downloads or 0,
-            "review_count": review_count or 0,
-            "favourite_count": favourite_count or 0,
-        })
-
-    return summaries
+    metrics = await author_analytics.get_book_metrics(token_user["id"], db)
+    return [
+        {
+            "id": book["id"],
+            "title": book["title"],
+            "num_of_downloads": book["num_of_downloads"] or 0,
+            "review_count": book["review_count"],
+            "favourite_count": book["favourite_count"],
+        }
+        for book in metrics
+    ]
 
 @router.get("/admin/metrics/summary", response_model=AdminBookMetricsSummary)
-async def get_admin_metrics_summary(db: AsyncSession = Depends(get_async_db)):
-    return await book_service.get_admin_metrics_summary_service(db)
\ No newline at end of file
+async def get_admin_metrics_summary():
+    return await admin_metrics.get_book_summary()
\ No newline at end of file
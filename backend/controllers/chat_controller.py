@@ -1,57 +1,300 @@
 import asyncio
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, Path
-from sqlalchemy import func
+import time
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, Path, Response
+from sqlalchemy import func, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import joinedload
 from database import get_db
-from models.user import ChatMessage, User, PrivateChatMessage
+from models.user import ChatMessage, User, PrivateChatMessage, PrivateChatReadState
 from datetime import datetime
-from typing import List
+from typing import Optional
 from pydantic import BaseModel
+from services.websocket_fanout import ClientConnection, fan_out, heartbeat, HEARTBEAT_INTERVAL_SECONDS
+from services.chat_backplane import chat_backplane
+from services.pagination import encode_cursor, decode_cursor
+from services.user_snippet_cache import user_snippets
+from services.chat_write_behind import chat_write_behind
 
 
 router = APIRouter()
 
+# Public chat history page sizes
+CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 200
+
+# Private conversation page sizes
+PRIVATE_CHAT_PAGE_SIZE = 100
+MAX_PRIVATE_CHAT_PAGE_SIZE = 200
+
+# Conversations per inbox page
+INBOX_PAGE_SIZE = 100
+MAX_INBOX_PAGE_SIZE = 200
+
+# Workers re-announce their online users this often; silent workers expire
+PRESENCE_INTERVAL_SECONDS = 15
+PRESENCE_TTL_SECONDS = 45
+# Presence changes within this window go out as one announcement
+PRESENCE_DEBOUNCE_SECONDS = 1
+
+# Open private chat sockets (tabs) per user; the oldest is closed beyond this
+MAX_CONNECTIONS_PER_USER = 5
+
+# Typing state is sent as one coalesced frame per flush interval at most
+TYPING_FLUSH_SECONDS = 0.5
+# A private "is typing" frame is repeated at most once per window while typing continues
+TYPING_WINDOW_SECONDS = 2
+# Typing stops after this long without a typing event
+TYPING_TIMEOUT_SECONDS = 3
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
+        # Each socket is written by its own sender task, see services/websocket_fanout.py
+        self.active_connections: dict[WebSocket, ClientConnection] = {}
+        # username -> last typing event received by this worker
+        self.typing: dict[str, float] = {}
+        # worker_id -> (usernames typing there, last announcement)
+        self.remote_typing: dict[str, tuple[set, float]] = {}
+        self._announced_typing: list[str] = []
+        self._typing_frame: list[str] = []
+        self._typing_task = None
+        self._heartbeat_task = None
+
+    async def connect(self, websocket: WebSocket) -> ClientConnection:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = ClientConnection(websocket, on_evict=self._remove)
+        self.active_connections[websocket] = connection
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        if self._typing_frame:
+            connection.send_json({"type": "typing_state", "usernames": self._typing_frame})
+        return connection
+
+    async def _heartbeat(self):
+        # Pings keep sockets honest; the silent ones are closed
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+            heartbeat(self.active_connections.values())
+
+    def _remove(self, connection: ClientConnection):
+        self.active_connections.pop(connection.websocket, None)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        connection = self.active_connections.get(websocket)
+        if connection:
+            connection.close()
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+        # Goes through the backplane so clients of every worker receive it
+        await chat_backplane.publish("public", message)
+
+    async def deliver(self, message: dict):
+        # Serialized once, queued for everyone; slow clients are evicted instead of waited on
+        fan_out(self.active_connections.values(), message)
+        # Let the sender tasks drain before the caller queues more
+        await asyncio.sleep(0)
+
+    def typing_started(self, username: str):
+        # Only recorded here; the flush loop sends the whole room's state periodically
+        self.typing[username] = time.monotonic()
+        if self._typing_task is None or self._typing_task.done():
+            self._typing_task = asyncio.create_task(self._flush_typing())
+
+    def typing_stopped(self, username: str):
+        self.typing.pop(username, None)
+
+    async def _flush_typing(self):
+        while True:
+            await asyncio.sleep(TYPING_FLUSH_SECONDS)
+            try:
+                now = time.monotonic()
+                for username, last_event in list(self.typing.items()):
+                    if now - last_event > TYPING_TIMEOUT_SECONDS:
+                        del self.typing[username]
+
+                usernames = sorted(self.typing)
+                # Re-announced while non-empty so other workers do not expire it
+                if usernames or usernames != self._announced_typing:
+                    self._announced_typing = usernames
+                    await chat_backplane.publish("typing", {
+                        "worker_id": chat_backplane.worker_id,
+                        "usernames": usernames
+                    })
+                else:
+                    self._push_typing()
+            except Exception as e:
+                print(f"⚠️ Typing flush failed: {e}")
+
+    async def on_typing(self, event: dict):
+        self.remote_typing[event["worker_id"]] = (set(event["usernames"]), time.monotonic())
+        self._push_typing()
+
+    def _push_typing(self):
+        now = time.monotonic()
+        usernames = set()
+        for worker_id, (worker_usernames, last_seen) in list(self.remote_typing.items()):
+            if now - last_seen > TYPING_TIMEOUT_SECONDS:
+                del self.remote_typing[worker_id]
+            else:
+                usernames |= worker_usernames
+
+        # One frame for the whole room, and only when the state changed
+        frame = sorted(usernames)
+        if frame != self._typing_frame:
+            self._typing_frame = frame
+            fan_out(self.active_connections.values(), {"type": "typing_state", "usernames": frame})
 
 
 class PrivateChatManager:
     def __init__(self):
-        self.connections: dict[int, WebSocket] = {}
-
-    async def connect(self, user_id: int, websocket: WebSocket):
+        # user_id -> that user's sockets (one per tab), oldest first
+        self.connections: dict[int, dict[WebSocket, ClientConnection]] = {}
+        # worker_id -> (user ids connected to that worker, last announcement)
+        self.presence: dict[str, tuple[set, float]] = {}
+        self._online_user_ids: list[int] = []
+        self._presence_task = None
+        self._presence_debounce = None
+        self._heartbeat_task = None
+        # (sender_id, receiver_id) -> [last typing event, last typing frame sent]
+        self.typing: dict[tuple[int, int], list[float]] = {}
+        self._typing_task = None
+
+    async def connect(self, user_id: int, websocket: WebSocket) -> ClientConnection:
         await websocket.accept()
-        self.connections[user_id] = websocket
-        await self.broadcast_online_users()
-
-    def disconnect(self, user_id: int):
-        if user_id in self.connections:
+        existing = self.connections.get(user_id, {})
+        while len(existing) >= MAX_CONNECTIONS_PER_USER:
+            next(iter(existing.values())).evict("too many connections for user")
+        user_connections = self.connections.setdefault(user_id, {})
+        connection = ClientConnection(websocket, on_evict=lambda c: self._remove(user_id, c))
+        user_connections[websocket] = connection
+
+        if self._presence_task is None or self._presence_task.done():
+            self._presence_task = asyncio.create_task(self._announce_presence())
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+        connection.send_json({"type": "online_users", "user_ids": self.online_user_ids()})
+        if len(user_connections) == 1:
+            # The user just came online; another tab would not change presence
+            self._schedule_presence()
+        return connection
+
+    def _remove(self, user_id: int, connection: ClientConnection):
+        user_connections = self.connections.get(user_id, {})
+        if user_connections.pop(connection.websocket, None) is connection and not user_connections:
             del self.connections[user_id]
-        asyncio.create_task(self.broadcast_online_users())
+            self._schedule_presence()
+
+    def disconnect(self, user_id: int, websocket: WebSocket):
+        connection = self.connections.get(user_id, {}).get(websocket)
+        if connection:
+            connection.close()
+
+    def _all_connections(self):
+        for user_connections in self.connections.values():
+            yield from user_connections.values()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+            heartbeat(list(self._all_connections()))
 
     async def send_personal_message(self, receiver_id: int, message: dict):
-        if receiver_id in self.connections:
-            await self.connections[receiver_id].send_json(message)
+        # The receiver may be connected to another worker
+        await chat_backplane.publish("private", {"user_id": receiver_id, "message": message})
+
+    async def deliver(self, event: dict):
+        # Every open tab of the user
+        fan_out(self.connections.get(event["user_id"], {}).values(), event["message"])
+
+    async def typing_started(self, sender_id: int, receiver_id: int, db: AsyncSession):
+        now = time.monotonic()
+        state = self.typing.get((sender_id, receiver_id))
+        if state and now - state[1] < TYPING_WINDOW_SECONDS:
+            # Already told the receiver within this window
+            state[0] = now
+            return
+
+        sender = await user_snippets.get_by_id(sender_id, db)
+        if not sender:
+            return
+
+        self.typing[(sender_id, receiver_id)] = [now, now]
+        if self._typing_task is None or self._typing_task.done():
+            self._typing_task = asyncio.create_task(self._expire_typing())
+        await self.send_personal_message(receiver_id, {
+            "type": "private_typing",
+            "sender_id": sender_id,
+            "username": sender["username"],
+            "typing": True
+        })
+
+    def typing_stopped(self, sender_id: int, receiver_id: int):
+        # The receiver clears the indicator when the message itself arrives
+        self.typing.pop((sender_id, receiver_id), None)
+
+    async def _expire_typing(self):
+        while True:
+            await asyncio.sleep(TYPING_FLUSH_SECONDS)
+            now = time.monotonic()
+            for (sender_id, receiver_id), (last_event, _) in list(self.typing.items()):
+                if now - last_event <= TYPING_TIMEOUT_SECONDS:
+                    continue
+                del self.typing[(sender_id, receiver_id)]
+                try:
+                    await self.send_personal_message(receiver_id, {
+                        "type": "private_typing",
+                        "sender_id": sender_id,
+                        "typing": False
+                    })
+                except Exception as e:
+                    print(f"⚠️ Typing stop notification failed: {e}")
 
     async def broadcast_online_users(self):
-        user_ids = list(self.connections.keys())
-        for conn in self.connections.values():
-            await conn.send_json({
+        # Every worker merges the announcements into one online list
+        await chat_backplane.publish("presence", {
+            "worker_id": chat_backplane.worker_id,
+            "user_ids": list(self.connections.keys())
+        })
+
+    def _schedule_presence(self):
+        # One pending announcement at a time; it picks up every change made meanwhile
+        if self._presence_debounce is None or self._presence_debounce.done():
+            self._presence_debounce = asyncio.create_task(self._debounced_presence())
+
+    async def _debounced_presence(self):
+        await asyncio.sleep(PRESENCE_DEBOUNCE_SECONDS)
+        try:
+            await self.broadcast_online_users()
+        except Exception as e:
+            print(f"⚠️ Presence announcement failed: {e}")
+
+    async def _announce_presence(self):
+        while True:
+            await asyncio.sleep(PRESENCE_INTERVAL_SECONDS)
+            try:
+                await self.broadcast_online_users()
+            except Exception as e:
+                print(f"⚠️ Presence announcement failed: {e}")
+
+    def online_user_ids(self) -> list[int]:
+        now = time.monotonic()
+        user_ids = set(self.connections)
+        for worker_id, (worker_user_ids, last_seen) in list(self.presence.items()):
+            if now - last_seen > PRESENCE_TTL_SECONDS:
+                del self.presence[worker_id]
+            elif worker_id != chat_backplane.worker_id:
+                user_ids |= worker_user_ids
+        return sorted(user_ids)
+
+    async def on_presence(self, event: dict):
+        self.presence[event["worker_id"]] = (set(event["user_ids"]), time.monotonic())
+        user_ids = self.online_user_ids()
+        if user_ids != self._online_user_ids:
+            self._online_user_ids = user_ids
+            fan_out(self._all_connections(), {
                 "type": "online_users",
                 "user_ids": user_ids
             })
@@ -62,41 +305,59 @@ class PrivateChatManager:
 manager = ConnectionManager()
 private_chat_manager = PrivateChatManager()
 
+chat_backplane.subscribe("public", manager.deliver)
+chat_backplane.subscribe("private", private_chat_manager.deliver)
+chat_backplane.subscribe("presence", private_chat_manager.on_presence)
+chat_backplane.subscribe("typing", manager.on_typing)
+
+
+
+def is_valid_content(content) -> bool:
+    return isinstance(content, str) and bool(content.strip())
 
 
 @router.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket, db: AsyncSession = Depends(get_db)):
-    await manager.connect(websocket)
+    connection = await manager.connect(websocket)
+    # The socket speaks for the first user it names; frames naming anyone else are dropped
+    socket_username = None
     print("📡 WebSocket connected")
     try:
         while True:
             data = await websocket.receive_json()
+            connection.touch()
             event_type = data.get("type", "message")  # default je "message"
+            if event_type == "pong":
+                continue
             username = data.get("username")
+            if not isinstance(username, str) or not username or \
+                    (socket_username is not None and username != socket_username):
+                continue
+            user = await user_snippets.get_by_username(username, db)
+            if not user:
+                continue
+            socket_username = username
 
             if event_type == "typing":
-                await manager.broadcast({
-                    "type": "typing",
-                    "username": username,
-                })
+                # Coalesced into periodic "typing_state" frames
+                manager.typing_started(username)
                 continue
 
             content = data.get("content")
-            result = await db.execute(select(User).where(User.username == username))
-            user = result.scalar_one_or_none()
+            manager.typing_stopped(username)
 
-            if user:
-                message = ChatMessage(user_id=user.id, content=content)
-                db.add(message)
-                await db.commit()
-                await db.refresh(message)
+            # Invalid messages are dropped before they reach the write-behind queue
+            if is_valid_content(content):
+                # Inline commit, or queued for a batched insert in write-behind mode
+                message = await chat_write_behind.persist(db, ChatMessage, user_id=user["id"], content=content)
 
                 await manager.broadcast({
                     "type": "message",
-                    "username": user.username,
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "icon": user.icon,
+                    "id": message.id,
+                    "username": user["username"],
+                    "first_name": user["first_name"],
+                    "last_name": user["last_name"],
+                    "icon": user["icon"],
                     "content": message.content,
                     "timestamp": message.timestamp.isoformat()
                 })
@@ -105,36 +366,71 @@ async def websocket_chat(websocket: WebSocket, db: AsyncSession = Depends(get_db
         print("🔌 WebSocket disconnected")
 
 @router.get("/chat/messages")
-async def get_all_messages(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(ChatMessage).options(selectinload(ChatMessage.user)).order_by(ChatMessage.timestamp)
-    )
-    messages = result.scalars().all()
-    return [
-        {
-            "username": msg.user.username,
-            "first_name": msg.user.first_name,
-            "last_name": msg.user.last_name,
-            "icon": msg.user.icon,
-            "content": msg.content,
-            "user_id": msg.user.id,
-            "timestamp": msg.timestamp.isoformat()
+async def get_all_messages(
+    before: Optional[str] = Query(None, description="Cursor: return messages older than this one"),
+    after: Optional[str] = Query(None, description="Cursor: return messages newer than this one"),
+    limit: int = Query(CHAT_PAGE_SIZE, ge=1, le=MAX_CHAT_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
+    sort_key = tuple_(ChatMessage.timestamp, ChatMessage.id)
+    query = select(ChatMessage.id, ChatMessage.user_id, ChatMessage.content, ChatMessage.timestamp)
+
+    # Keyset pagination over the (timestamp, id) index; one extra row tells whether there is more
+    if after:
+        query = query.where(sort_key > tuple_(*decode_cursor(after, datetime, int)))
+        query = query.order_by(ChatMessage.timestamp, ChatMessage.id)
+    else:
+        if before:
+            query = query.where(sort_key < tuple_(*decode_cursor(before, datetime, int)))
+        query = query.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not after:
+        rows.reverse()
+
+    # Each author is sent once instead of with every message
+    user_ids = {row.user_id for row in rows}
+    users = {}
+    if user_ids:
+        user_rows = await db.execute(
+            select(User.id, User.username, User.first_name, User.last_name, User.icon)
+            .where(User.id.in_(user_ids))
+        )
+        users = {
+            u.id: {"username": u.username, "first_name": u.first_name, "last_name": u.last_name, "icon": u.icon}
+            for u in user_rows
         }
-        for msg in messages
-    ]
 
-@router.delete("/chat/messages/{timestamp}")
-async def delete_message(timestamp: str, username: str = Query(...), db: AsyncSession = Depends(get_db)):
-    try:
-        parsed_timestamp = datetime.fromisoformat(timestamp)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid timestamp format")
+    oldest, newest = (rows[0], rows[-1]) if rows else (None, None)
+    return {
+        "messages": [
+            {
+                "id": row.id,
+                "user_id": row.user_id,
+                "content": row.content,
+                "timestamp": row.timestamp.isoformat()
+            }
+            for row in rows
+        ],
+        "users": users,
+        "has_more": has_more,
+        # Pass as ?before= to load older history, ?after= to catch up on newer messages
+        "before_cursor": encode_cursor(oldest.timestamp, oldest.id) if oldest else before,
+        "after_cursor": encode_cursor(newest.timestamp, newest.id) if newest else after
+    }
 
+@router.delete("/chat/messages/{message_id}")
+async def delete_message(message_id: int, username: str = Query(...), db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(ChatMessage)
         .join(ChatMessage.user)
         .where(
-            ChatMessage.timestamp == parsed_timestamp,
+            ChatMessage.id == message_id,
             User.username == username
         )
     )
@@ -149,7 +445,7 @@ async def delete_message(timestamp: str, username: str = Query(...), db: AsyncSe
 
     await manager.broadcast({
         "type": "delete",
-        "timestamp": timestamp
+        "id": message_id
     })
 
     return {"detail": "Message deleted."}
@@ -158,18 +454,13 @@ class EditMessageData(BaseModel):
     username: str
     new_content: str
 
-@router.put("/chat/messages/{timestamp}")
-async def edit_message(timestamp: str, data: EditMessageData, db: AsyncSession = Depends(get_db)):
-    try:
-        parsed_timestamp = datetime.fromisoformat(timestamp)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid timestamp format")
-
+@router.put("/chat/messages/{message_id}")
+async def edit_message(message_id: int, data: EditMessageData, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(ChatMessage)
         .join(ChatMessage.user)
         .where(
-            ChatMessage.timestamp == parsed_timestamp,
+            ChatMessage.id == message_id,
             User.username == data.username
         )
     )
@@ -184,7 +475,7 @@ async def edit_message(timestamp: str, data: EditMessageData, db: AsyncSession =
 
     await manager.broadcast({
         "type": "edit",
-        "timestamp": timestamp,
+        "id": message_id,
         "new_content": message.content,
     })
 
@@ -192,43 +483,46 @@ async def edit_message(timestamp: str, data: EditMessageData, db: AsyncSession =
 
 @router.websocket("/ws/private-chat/{user_id}")
 async def private_chat(websocket: WebSocket, user_id: int, db: AsyncSession = Depends(get_db)):
-    await private_chat_manager.connect(user_id, websocket)
+    connection = await private_chat_manager.connect(user_id, websocket)
     try:
         while True:
             data = await websocket.receive_json()
+            connection.touch()
             event_type = data.get("type", "message")
+            if event_type == "pong":
+                continue
             sender_id = data.get("sender_id")
             receiver_id = data.get("receiver_id")
 
+            # A socket only speaks for its own user, and only to a real user id
+            if sender_id != user_id or not isinstance(receiver_id, int):
+                continue
+
             # 🟨 TIPKANJE
             if event_type == "typing":
-                result = await db.execute(select(User).where(User.id == sender_id))
-                sender = result.scalar_one_or_none()
-
-                if sender:
-                    await private_chat_manager.send_personal_message(receiver_id, {
-                        "type": "private_typing",
-                        "sender_id": sender_id,
-                        "username": sender.username
-                    })
+                # Throttled per conversation; a stop frame follows when typing ends
+                await private_chat_manager.typing_started(sender_id, receiver_id, db)
                 continue
 
             # 🟩 SLANJE PORUKE
             content = data.get("content")
+            private_chat_manager.typing_stopped(sender_id, receiver_id)
 
-            msg = PrivateChatMessage(
-                sender_id=sender_id,
-                receiver_id=receiver_id,
-                content=content
-            )
-            db.add(msg)
-            await db.commit()
-            await db.refresh(msg)
-
-            result = await db.execute(select(User).where(User.id == sender_id))
-            sender = result.scalar_one_or_none()
+            # Invalid messages are dropped before they reach the write-behind queue
+            if not is_valid_content(content):
+                continue
+            sender = await user_snippets.get_by_id(sender_id, db)
+            receiver = await user_snippets.get_by_id(receiver_id, db)
+
+            if sender and receiver:
+                msg = await chat_write_behind.persist(
+                    db,
+                    PrivateChatMessage,
+                    sender_id=sender_id,
+                    receiver_id=receiver_id,
+                    content=content
+                )
 
-            if sender:
                 message_data = {
                     "type": "private_message",
                     "sender_id": sender_id,
@@ -236,43 +530,97 @@ async def private_chat(websocket: WebSocket, user_id: int, db: AsyncSession = De
                     "content": content,
                     "timestamp": msg.timestamp.isoformat(),
                     "message_id": msg.id,
-                    "first_name": sender.first_name,
-                    "last_name": sender.last_name,
-                    "icon": sender.icon
+                    "first_name": sender["first_name"],
+                    "last_name": sender["last_name"],
+                    "icon": sender["icon"]
                 }
 
                 await private_chat_manager.send_personal_message(sender_id, message_data)
                 await private_chat_manager.send_personal_message(receiver_id, message_data)
 
     except WebSocketDisconnect:
-        private_chat_manager.disconnect(user_id)
+        private_chat_manager.disconnect(user_id, websocket)
 
 
 
-@router.get("/private-chat/{user1_id}/{user2_id}")
-async def get_private_messages(user1_id: int, user2_id: int, db: AsyncSession = Depends(get_db)):
-    # 1. Dohvati sve poruke između ova dva korisnika
+async def mark_conversation_read(db: AsyncSession, user_id: int, peer_id: int) -> int:
+    """Mark everything peer_id sent to user_id as read; returns how many messages changed"""
+    latest = (await db.execute(
+        select(PrivateChatMessage.timestamp, PrivateChatMessage.id)
+        .where(PrivateChatMessage.sender_id == peer_id, PrivateChatMessage.receiver_id == user_id)
+        .order_by(PrivateChatMessage.timestamp.desc(), PrivateChatMessage.id.desc())
+        .limit(1)
+    )).one_or_none()
+    if latest is None:
+        return 0
+    latest_timestamp, latest_id = latest
+
+    # Watermark već pokriva najnoviju poruku - nema pisanja
+    state = await db.get(PrivateChatReadState, (user_id, peer_id))
+    if (state and state.last_read_timestamp is not None
+            and (state.last_read_timestamp, state.last_read_message_id) >= (latest_timestamp, latest_id)):
+        return 0
+
+    # Bounded by time only: ids are not ordered in time under write-behind
     result = await db.execute(
+        update(PrivateChatMessage)
+        .where(
+            PrivateChatMessage.receiver_id == user_id,
+            PrivateChatMessage.sender_id == peer_id,
+            PrivateChatMessage.is_read == False,
+            PrivateChatMessage.timestamp <= latest_timestamp
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    if state:
+        state.last_read_timestamp = latest_timestamp
+        state.last_read_message_id = latest_id
+    else:
+        db.add(PrivateChatReadState(
+            user_id=user_id, peer_id=peer_id,
+            last_read_timestamp=latest_timestamp, last_read_message_id=latest_id
+        ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request opened the same conversation and created the watermark first
+        await db.rollback()
+        return 0
+    return result.rowcount
+
+
+@router.get("/private-chat/{user1_id}/{user2_id}")
+async def get_private_messages(
+    user1_id: int,
+    user2_id: int,
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(PRIVATE_CHAT_PAGE_SIZE, ge=1, le=MAX_PRIVATE_CHAT_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    # 1. Dohvati stranicu poruka između ova dva korisnika (najnovije prve)
+    query = (
         select(PrivateChatMessage)
-        .options(selectinload(PrivateChatMessage.sender))
         .where(
             ((PrivateChatMessage.sender_id == user1_id) & (PrivateChatMessage.receiver_id == user2_id)) |
             ((PrivateChatMessage.sender_id == user2_id) & (PrivateChatMessage.receiver_id == user1_id))
         )
-        .order_by(PrivateChatMessage.timestamp)
+        .order_by(PrivateChatMessage.timestamp.desc(), PrivateChatMessage.id.desc())
+        .limit(limit + 1)
     )
-    messages = result.scalars().all()
-
-    # 2. Označi poruke koje su POSLANE KA user1_id kao pročitane
-    count_updated = False
-    for msg in messages:
-        if msg.receiver_id == user1_id and not msg.is_read:
-            msg.is_read = True
-            count_updated = True
-
-    if count_updated:
-        await db.commit()
-
+    if before:
+        query = query.where(
+            tuple_(PrivateChatMessage.timestamp, PrivateChatMessage.id) < tuple_(*decode_cursor(before, datetime, int))
+        )
+    messages = (await db.execute(query)).scalars().all()
+    if len(messages) > limit:
+        messages = messages[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(messages[-1].timestamp, messages[-1].id)
+    messages.reverse()
+
+    # 2. Otvaranje razgovora (prva stranica) označava poruke POSLANE KA user1_id kao pročitane
+    if before is None and await mark_conversation_read(db, user1_id, user2_id):
         # 🔁 Pošalji WebSocket poruku da su sve poruke od user2_id prema user1_id pročitane
         await private_chat_manager.send_personal_message(user1_id, {
             "type": "unread_count_update",
@@ -281,6 +629,10 @@ async def get_private_messages(user1_id: int, user2_id: int, db: AsyncSession =
         })
 
     # 3. Vrati formatirane poruke
+    senders = {
+        user_id: await user_snippets.get_by_id(user_id, db) or {}
+        for user_id in {m.sender_id for m in messages}
+    }
     return [
         {
             "message_id": m.id,
@@ -288,15 +640,14 @@ async def get_private_messages(user1_id: int, user2_id: int, db: AsyncSession =
             "receiver_id": m.receiver_id,
             "content": m.content,
             "timestamp": m.timestamp.isoformat(),
-            "first_name": m.sender.first_name,
-            "last_name": m.sender.last_name,
-            "icon": m.sender.icon
+            "first_name": senders[m.sender_id].get("first_name"),
+            "last_name": senders[m.sender_id].get("last_name"),
+            "icon": senders[m.sender_id].get("icon")
         }
         for m in messages
     ]
 
 
-
 @router.delete("/private-chat/messages/{message_id}")
 async def delete_private_chat_message(
     message_id: int,
@@ -366,47 +717,95 @@ async def edit_private_message(
     
 
 @router.get("/chat/inbox/{user_id}")
-async def get_inbox_users(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(PrivateChatMessage)
+async def get_inbox_users(
+    user_id: int,
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(INBOX_PAGE_SIZE, ge=1, le=MAX_INBOX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    # Both directions of every conversation, each branch served by its own composite index
+    sent = select(
+        PrivateChatMessage.id,
+        PrivateChatMessage.content,
+        PrivateChatMessage.timestamp,
+        PrivateChatMessage.receiver_id.label("other_id")
+    ).where(PrivateChatMessage.sender_id == user_id)
+    received = select(
+        PrivateChatMessage.id,
+        PrivateChatMessage.content,
+        PrivateChatMessage.timestamp,
+        PrivateChatMessage.sender_id.label("other_id")
+    ).where(PrivateChatMessage.receiver_id == user_id)
+    messages = union_all(sent, received).subquery()
+
+    # Latest message per counterpart
+    ranked = select(
+        messages,
+        func.row_number().over(
+            partition_by=messages.c.other_id,
+            order_by=(messages.c.timestamp.desc(), messages.c.id.desc())
+        ).label("rn")
+    ).subquery()
+
+    unread = PrivateChatMessage.__table__.alias("unread")
+    unread_count = (
+        select(func.count())
+        .select_from(unread)
         .where(
-            (PrivateChatMessage.sender_id == user_id) |
-            (PrivateChatMessage.receiver_id == user_id)
+            unread.c.receiver_id == user_id,
+            unread.c.sender_id == ranked.c.other_id,
+            unread.c.is_read == False
         )
-        .order_by(PrivateChatMessage.timestamp.desc())
+        .scalar_subquery()
     )
-    messages = result.scalars().all()
-
-    latest_per_user = {}
-    for msg in messages:
-        other_id = msg.receiver_id if msg.sender_id == user_id else msg.sender_id
-        if other_id not in latest_per_user:
-            latest_per_user[other_id] = msg
 
-    users_result = await db.execute(
-        select(User).where(User.id.in_(latest_per_user.keys()))
-    )
-    users = users_result.scalars().all()
-    user_map = {u.id: u for u in users}
-
-    # 🆕 Prebroj nepročitane poruke
-    unread_counts_result = await db.execute(
-        select(PrivateChatMessage.sender_id, func.count())
-        .where(PrivateChatMessage.receiver_id == user_id, PrivateChatMessage.is_read == False)
-        .group_by(PrivateChatMessage.sender_id)
+    query = (
+        select(
+            ranked.c.id,
+            ranked.c.content,
+            ranked.c.timestamp,
+            User.id.label("user_id"),
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.icon,
+            unread_count.label("unread_count")
+        )
+        .join(User, User.id == ranked.c.other_id)
+        .where(ranked.c.rn == 1)
+        .order_by(ranked.c.timestamp.desc(), ranked.c.id.desc())
+        .limit(limit + 1)
     )
-    unread_map = {sender_id: count for sender_id, count in unread_counts_result.all()}
+    if before:
+        query = query.where(
+            tuple_(ranked.c.timestamp, ranked.c.id) < tuple_(*decode_cursor(before, datetime, int))
+        )
+
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    # Unread messages across all conversations, not just this page (for the header badge)
+    if not before:
+        unread_total = await db.scalar(
+            select(func.count(PrivateChatMessage.id))
+            .join(User, User.id == PrivateChatMessage.sender_id)
+            .where(PrivateChatMessage.receiver_id == user_id, PrivateChatMessage.is_read == False)
+        )
+        response.headers["X-Unread-Total"] = str(unread_total)
 
     return [
         {
-            "id": uid,
-            "username": user_map[uid].username,
-            "first_name": user_map[uid].first_name,
-            "last_name": user_map[uid].last_name,
-            "icon": user_map[uid].icon,
-            "last_message": latest_per_user[uid].content,
-            "last_time": latest_per_user[uid].timestamp.isoformat(),
-            "unread_count": unread_map.get(uid, 0),  # 🆕 Dodano ovdje
+            "id": row.user_id,
+            "username": row.username,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "icon": row.icon,
+            "last_message": row.content,
+            "last_time": row.timestamp.isoformat(),
+            "unread_count": row.unread_count,  # 🆕 Dodano ovdje
         }
-        for uid in latest_per_user
+        for row in rows
     ]
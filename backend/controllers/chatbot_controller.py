@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from fastapi.responses import StreamingResponse
-from services.rag_chatbot_service import RagChatbotService
+from services.auth_service import RoleChecker
+from services.rag_chatbot_service import chatbot_provider
 from models.chatbot_models import ChatMessage, ChatResponse
 import json
 import logging
@@ -8,17 +10,13 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/chatbot", tags=["chatbot"])
 
-# Initialize service with error handling
-try:
-    chatbot_service = RagChatbotService()
-    logger.info("✅ Chatbot controller initialized")
-except Exception as e:
-    logger.error(f"❌ Chatbot controller error: {e}")
-    chatbot_service = None
+# The service is built in the background after startup (see main.py);
+# endpoints wait briefly for it and degrade gracefully while it warms up.
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     """Chat endpoint"""
+    chatbot_service = await chatbot_provider.get()
     if not chatbot_service:
         return ChatResponse(
             text="Chatbot service is currently unavailable. Please try again later.",
@@ -56,6 +54,7 @@ async def chat(message: ChatMessage):
 @router.post("/chat/stream")
 async def chat_stream(message: ChatMessage):
     """Streaming chat endpoint"""
+    chatbot_service = await chatbot_provider.get()
     if not chatbot_service:
         async def error_stream():
             yield "data: {}\n\n".format(json.dumps({
@@ -68,8 +67,6 @@ async def chat_stream(message: ChatMessage):
     
     async def generate_response():
         try:
-            yield "data: {}\n\n".format(json.dumps({"type": "start"}))
-            
             async for chunk in chatbot_service.get_streaming_response(
                 message.text,
                 message.session_id
@@ -91,6 +88,7 @@ async def chat_stream(message: ChatMessage):
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
             "Access-Control-Allow-Origin": "*"
         }
     )
@@ -98,23 +96,59 @@ async def chat_stream(message: ChatMessage):
 @router.post("/feedback")
 async def submit_feedback(feedback_data: dict):
     """Submit feedback"""
+    chatbot_service = await chatbot_provider.get()
     if chatbot_service:
         await chatbot_service.save_feedback(feedback_data)
         return {"status": "success", "message": "Feedback received"}
     return {"status": "error", "message": "Service unavailable"}
 
+@router.get("/feedback", dependencies=[Depends(RoleChecker(["admin"]))])
+async def list_feedback(
+    session_id: Optional[str] = None,
+    intent: Optional[str] = None,
+    rating: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """List feedback, newest first"""
+    chatbot_service = await chatbot_provider.get()
+    if not chatbot_service:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    
+    feedback = await chatbot_service.get_feedback(session_id=session_id, intent=intent, rating=rating, limit=limit)
+    return {"feedback": feedback, "count": len(feedback)}
+
+@router.get("/feedback/summary", dependencies=[Depends(RoleChecker(["admin"]))])
+async def feedback_summary(
+    group_by: str = Query("intent", pattern="^(intent|session_id|rating)$"),
+    session_id: Optional[str] = None,
+    intent: Optional[str] = None,
+    rating: Optional[int] = None
+):
+    """Aggregate feedback by intent, session or rating"""
+    chatbot_service = await chatbot_provider.get()
+    if not chatbot_service:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    
+    summary = await chatbot_service.get_feedback_summary(
+        group_by=group_by, session_id=session_id, intent=intent, rating=rating
+    )
+    return {"group_by": group_by, "groups": summary}
+
 @router.get("/health")
 async def health_check():
     """Health check"""
+    status = chatbot_provider.get_status()
+    health = {"ready": "healthy", "warming_up": "starting", "not_started": "starting"}
     return {
-        "status": "healthy" if chatbot_service else "unhealthy",
+        "status": health.get(status["state"], "unhealthy"),
         "service": "Model-Free RAG Chatbot",
-        "ready": chatbot_service is not None
+        **status
     }
 
 @router.post("/knowledge")
 async def add_knowledge(knowledge_data: dict):
     """Add knowledge"""
+    chatbot_service = await chatbot_provider.get()
     if not chatbot_service:
         raise HTTPException(status_code=503, detail="Service unavailable")
     
@@ -131,17 +165,19 @@ async def add_knowledge(knowledge_data: dict):
 @router.get("/session/{session_id}/history")
 async def get_session_history(session_id: str):
     """Get session history"""
+    chatbot_service = await chatbot_provider.get()
     if not chatbot_service:
         raise HTTPException(status_code=503, detail="Service unavailable")
     
-    history = chatbot_service.get_session_history(session_id)
+    history = await chatbot_service.get_session_history(session_id)
     return {"session_id": session_id, "history": history}
 
 @router.delete("/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear session"""
+    chatbot_service = await chatbot_provider.get()
     if not chatbot_service:
         raise HTTPException(status_code=503, detail="Service unavailable")
     
-    chatbot_service.clear_session(session_id)
+    await chatbot_service.clear_session(session_id)
     return {"status": "success", "message": f"Session {session_id} cleared"}
\ No newline at end of file
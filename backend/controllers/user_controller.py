@@ -5,14 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException, Path, Query, UploadFile,
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from models.book import Book, Script
 from models.user import User, Role, RoleNameEnum
-from models.event import Event
 from services.auth_service import get_current_user
 from schemas import UserCreate, UserDisplay
 from schemas.user import UserOut, UserDisplay2, AdminUserOut
 from database import get_db, engine, get_async_db
 from services import user_service
+from services.admin_metrics_service import admin_metrics
 from sqlalchemy.orm import selectinload
 from schemas.user import UserUpdateRequest
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -395,32 +394,8 @@ async def update_user_role(
     return await user_service.update_user_role(db, user_id, new_role)
 
 @router.get("/admin/dashboard-metrics")
-async def get_dashboard_metrics(db: AsyncSession = Depends(get_async_db)):
-    total_books = await db.scalar(select(func.count(Book.id)))
-    total_users = await db.scalar(select(func.count(User.id)))
-    total_scripts = await db.scalar(select(func.count(Script.id)))
-    total_events = await db.scalar(select(func.count(Event.id)))
-
-    total_authors = await db.scalar(
-        select(func.count(User.id))
-        .join(User.roles)
-        .where(Role.name == "author")
-    )
-
-    total_readers = await db.scalar(
-        select(func.count(User.id))
-        .join(User.roles)
-        .where(Role.name == "reader")
-    )
-
-    return {
-        "total_books": total_books,
-        "total_users": total_users,
-        "total_authors": total_authors,
-        "total_readers": total_readers,
-        "total_scripts": total_scripts,
-        "total_events": total_events,
-    }
+async def get_dashboard_metrics():
+    return await admin_metrics.get_dashboard_totals()
 
 @router.get("/admin/chat-activity")
 async def get_chat_activity(db: AsyncSession = Depends(get_async_db)):
@@ -15,6 +15,10 @@ from controllers import auth_controller
 from controllers import chatbot_controller
 from controllers import chat_controller
 from controllers import scripts_controller
+from services.rag_chatbot_service import chatbot_provider
+from services.chat_backplane import chat_backplane
+from services.chat_write_behind import chat_write_behind
+from services.admin_metrics_service import admin_metrics
 
 import traceback
 
@@ -55,6 +59,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Kursor sljedeće stranice za paginirane liste
+    expose_headers=["X-Next-Cursor", "X-Total-Count-Estimate", "X-Unread-Total"],
 )
 
 # Uključivanje ruta
@@ -76,6 +82,24 @@ async def on_startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    # Chat događaji idu kroz backplane da bi stigli do svih workera
+    await chat_backplane.start()
+    await chat_write_behind.start()
+
+    # Chatbot index se učitava u pozadini, van kritičnog puta pokretanja
+    chatbot_provider.start_warmup()
+
+    # Admin metrike se osvježavaju periodično, ne na svaki zahtjev
+    await admin_metrics.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Upisivanje preostalih feedback zapisa i chat poruka prije gašenja
+    await admin_metrics.stop()
+    await chatbot_provider.shutdown()
+    await chat_write_behind.stop()
+    await chat_backplane.stop()
+
 @app.get("/")
 async def root():
     return {"message": "Dobrodošli na Bookify API!"}
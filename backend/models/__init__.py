@@ -1,6 +1,7 @@
 from models.book import (
     Book,
     BookForSale,
+    BookStats,
     book_favourites,
     book_categories,
 )
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 
 # Many-to-Many: User ↔ Favourite Books
@@ -23,8 +24,10 @@ class Book(Base):
     title = Column(String, nullable=False)
     path = Column(String, nullable=False)
     description = Column(String)
-    num_of_downloads = Column(Integer, default=0)
+    num_of_downloads = Column(Integer, default=0, server_default="0", nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Weighted title/author/description vector, maintained by services/book_search.py
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), nullable=True))
 
     author = relationship("User", back_populates="books_authored")
     reviews = relationship("Review", back_populates="book")
@@ -32,6 +35,23 @@ class Book(Base):
     favourited_by = relationship("User", secondary=book_favourites, back_populates="favourite_books")
     categories = relationship("Category", secondary=book_categories, back_populates="books")
 
+    __table_args__ = (
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        # Keyset pagination of the catalog by title / downloads
+        Index("ix_books_title_id", "title", "id"),
+        Index("ix_books_num_of_downloads_id", "num_of_downloads", "id"),
+    )
+
+class BookStats(Base):
+    """Per-book counters kept up to date by the writes that change them (see repositories/book_stats_repository.py)"""
+    __tablename__ = "book_stats"
+
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    favourite_count = Column(Integer, nullable=False, default=0, server_default="0")
+
 class BookForSale(Base):
     __tablename__ = "book_for_sale"
 
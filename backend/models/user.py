@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Date, ForeignKey, Table, Enum, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Date, ForeignKey, Table, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -105,6 +105,13 @@ class ChatMessage(Base):
 
     user = relationship("User", back_populates="chat_messages")
 
+    __table_args__ = (
+        # Keyset pagination of the public chat history
+        Index("ix_chat_messages_timestamp_id", "timestamp", "id"),
+        # Per-user message history
+        Index("ix_chat_messages_user_id_timestamp", "user_id", "timestamp"),
+    )
+
 class PrivateChatMessage(Base):
     __tablename__ = "private_chat_messages"
 
@@ -118,3 +125,19 @@ class PrivateChatMessage(Base):
     
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
+
+    __table_args__ = (
+        # Inbox and conversation queries, one index per direction
+        Index("ix_private_chat_messages_sender_receiver_timestamp", "sender_id", "receiver_id", "timestamp"),
+        Index("ix_private_chat_messages_receiver_sender_timestamp", "receiver_id", "sender_id", "timestamp"),
+    )
+
+class PrivateChatReadState(Base):
+    __tablename__ = "private_chat_read_states"
+
+    # Last message from peer_id that user_id has read, as its (timestamp, id);
+    # ids alone are not ordered in time once write-behind reserves id blocks
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    peer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_read_message_id = Column(Integer, nullable=False)
+    last_read_timestamp = Column(DateTime, nullable=True)
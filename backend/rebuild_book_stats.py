@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script to verify and rebuild the book_stats counters from the review and
+book_favourites tables. Run it after bulk imports or manual data fixes, or
+periodically (cron) to catch drift:
+
+    python rebuild_book_stats.py           # fix any drifted counters
+    python rebuild_book_stats.py --verify  # only report them
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Run from anywhere; imports are relative to the backend directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import async_session
+from repositories.book_stats_repository import rebuild_book_stats
+
+
+async def main(fix: bool):
+    print("🔍 Checking book_stats against reviews and favourites...")
+
+    async with async_session() as db:
+        drifted = await rebuild_book_stats(db, fix=fix)
+
+    if not drifted:
+        print("✅ All book counters are correct")
+    elif fix:
+        print(f"🔧 Rebuilt counters of {len(drifted)} books: {drifted[:20]}{' ...' if len(drifted) > 20 else ''}")
+    else:
+        print(f"⚠️ {len(drifted)} books have drifted counters: {drifted[:20]}{' ...' if len(drifted) > 20 else ''}")
+    return drifted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--verify", action="store_true", help="report drift without changing anything")
+    args = parser.parse_args()
+
+    drifted = asyncio.run(main(fix=not args.verify))
+    sys.exit(1 if drifted and args.verify else 0)
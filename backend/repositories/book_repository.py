@@ -4,7 +4,8 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy import func
 
-from models import Book, User, Review, book_favourites
+from models import Book, BookStats, User, Review
+from repositories.book_stats_repository import average_rating_expression
 from schemas import BookCreate
 
 
@@ -62,89 +63,101 @@ async def get_book_reviews(book_id: int, db: AsyncSession) -> List[Review]:
 
 async def get_book_average_rating(book_id: int, db: AsyncSession) -> Optional[float]:
     result = await db.execute(
-        select(func.avg(Review.rating)).where(Review.book_id == book_id)
+        select(average_rating_expression()).where(BookStats.book_id == book_id)
     )
     return result.scalar_one_or_none()
 
 
-async def get_admin_book_metrics_summary(db: AsyncSession):
-    total_books = await db.scalar(select(func.count(Book.id)))
+async def get_author_book_metrics(author_id: int, db: AsyncSession) -> List[dict]:
+    result = await db.execute(
+        select(
+            Book.id,
+            Book.title,
+            Book.num_of_downloads,
+            average_rating_expression().label("average_rating"),
+            func.coalesce(BookStats.review_count, 0).label("review_count"),
+            func.coalesce(BookStats.favourite_count, 0).label("favourite_count")
+        )
+        .outerjoin(BookStats, BookStats.book_id == Book.id)
+        .where(Book.author_id == author_id)
+        .order_by(Book.id)
+    )
+    return [dict(row._mapping) for row in result.all()]
+
+
+# Size of the admin dashboard's top/bottom lists
+ADMIN_TOP_K = 5
 
-    top_authors_stmt = (
+
+async def count_books(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count(Book.id)))
+
+
+async def get_top_authors_by_uploads(db: AsyncSession, limit: int = ADMIN_TOP_K) -> List[dict]:
+    result = await db.execute(
         select(User.id, User.username, func.count(Book.id).label("book_count"))
         .join(Book, Book.author_id == User.id)
-        .group_by(User.id)
-        .order_by(func.count(Book.id).desc())
-        .limit(5)
+        .group_by(User.id, User.username)
+        .order_by(func.count(Book.id).desc(), User.id)
+        .limit(limit)
     )
-    top_authors = (await db.execute(top_authors_stmt)).all()
+    return [
+        {"author_id": a.id, "username": a.username, "book_count": a.book_count}
+        for a in result.all()
+    ]
+
 
-    top_downloaded_stmt = (
+async def get_most_downloaded_books(db: AsyncSession, limit: int = ADMIN_TOP_K) -> List[dict]:
+    result = await db.execute(
         select(Book.id, Book.title, Book.num_of_downloads)
-        .order_by(Book.num_of_downloads.desc())
-        .limit(5)
+        .order_by(Book.num_of_downloads.desc(), Book.id)
+        .limit(limit)
     )
-    top_downloaded = (await db.execute(top_downloaded_stmt)).all()
+    return [
+        {"book_id": b.id, "title": b.title, "downloads": b.num_of_downloads}
+        for b in result.all()
+    ]
 
-    rating_stmt = (
-        select(Book.id, Book.title, func.avg(Review.rating), func.count(Review.id))
-        .join(Review, Review.book_id == Book.id)
-        .group_by(Book.id)
-        .having(func.count(Review.id) > 0)
-    )
-    ratings = (await db.execute(rating_stmt)).all()
-    ratings_sorted = sorted(ratings, key=lambda r: r[2] or 0)
-    top_rated = ratings_sorted[-5:][::-1]
-    bottom_rated = ratings_sorted[:5]
-
-    fav_stmt = (
-        select(Book.id, Book.title, func.count().label("favourite_count"))
-        .select_from(book_favourites)
-        .join(Book, Book.id == book_favourites.c.book_id)
-        .group_by(Book.id)
-        .order_by(func.count().desc())
-        .limit(5)
+
+async def get_rated_books(db: AsyncSession, best: bool = True, limit: int = ADMIN_TOP_K) -> List[dict]:
+    """Highest (or lowest) average rating among books with at least one rating"""
+    average_rating = average_rating_expression()
+    result = await db.execute(
+        select(Book.id, Book.title, average_rating.label("avg_rating"), BookStats.review_count)
+        .join(BookStats, BookStats.book_id == Book.id)
+        .where(BookStats.rating_count > 0)
+        .order_by(average_rating.desc() if best else average_rating.asc(), Book.id)
+        .limit(limit)
     )
-    favourites = (await db.execute(fav_stmt)).all()
+    return [
+        {"book_id": b.id, "title": b.title, "avg_rating": round(b.avg_rating, 2), "reviews": b.review_count}
+        for b in result.all()
+    ]
 
-    total_downloads = await db.scalar(select(func.sum(Book.num_of_downloads)))
-    total_reviews = await db.scalar(select(func.count(Review.id)))
-    avg_global_rating = await db.scalar(select(func.avg(Review.rating)))
 
-    total_favourites = await db.scalar(
-        select(func.count()).select_from(book_favourites)
+async def get_most_favourited_books(db: AsyncSession, limit: int = ADMIN_TOP_K) -> List[dict]:
+    result = await db.execute(
+        select(Book.id, Book.title, BookStats.favourite_count)
+        .join(BookStats, BookStats.book_id == Book.id)
+        .where(BookStats.favourite_count > 0)
+        .order_by(BookStats.favourite_count.desc(), Book.id)
+        .limit(limit)
     )
+    return [
+        {"book_id": f.id, "title": f.title, "favourites": f.favourite_count}
+        for f in result.all()
+    ]
 
-    avg_favourites_per_book = total_favourites / total_books if total_books else 0
-    avg_reviews_per_book = total_reviews / total_books if total_books else 0
-
-    return {
-        "total_books": total_books,
-        "top_authors_by_uploads": [
-            {"author_id": a.id, "username": a.username, "book_count": a.book_count}
-            for a in top_authors
-        ],
-        "most_downloaded_books": [
-            {"book_id": b.id, "title": b.title, "downloads": b.num_of_downloads}
-            for b in top_downloaded
-        ],
-        "top_rated_books": [
-            {"book_id": b[0], "title": b[1], "avg_rating": round(b[2], 2), "reviews": b[3]}
-            for b in top_rated
-        ],
-        "bottom_rated_books": [
-            {"book_id": b[0], "title": b[1], "avg_rating": round(b[2], 2), "reviews": b[3]}
-            for b in bottom_rated
-        ],
-        "most_favourited_books": [
-            {"book_id": f.id, "title": f.title, "favourites": f.favourite_count}
-            for f in favourites
-        ],
-        "engagement": {
-            "total_downloads": total_downloads or 0,
-            "total_reviews": total_reviews or 0,
-            "avg_global_rating": round(avg_global_rating or 0, 2),
-            "avg_favourites_per_book": round(avg_favourites_per_book, 2),
-            "avg_reviews_per_book": round(avg_reviews_per_book, 2),
-        }
-    }
\ No newline at end of file
+
+async def get_engagement_totals(db: AsyncSession) -> dict:
+    downloads = select(func.coalesce(func.sum(Book.num_of_downloads), 0)).scalar_subquery()
+    result = await db.execute(
+        select(
+            downloads.label("total_downloads"),
+            func.coalesce(func.sum(BookStats.review_count), 0).label("total_reviews"),
+            func.coalesce(func.sum(BookStats.rating_sum), 0).label("rating_sum"),
+            func.coalesce(func.sum(BookStats.rating_count), 0).label("rating_count"),
+            func.coalesce(func.sum(BookStats.favourite_count), 0).label("total_favourites")
+        )
+    )
+    return {key: int(value) for key, value in result.one()._mapping.items()}
@@ -0,0 +1,117 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import Float, cast, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Book, BookStats, Review, book_favourites
+
+COUNTERS = ("rating_sum", "rating_count", "review_count", "favourite_count")
+
+
+def average_rating_expression():
+    """Average rating from the counters; NULL for a book without ratings"""
+    return cast(BookStats.rating_sum, Float) / func.nullif(BookStats.rating_count, 0)
+
+
+def _upsert(db: AsyncSession, values: dict):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(BookStats).values(**values)
+
+
+async def apply_delta(db: AsyncSession, book_id: int, **deltas: int):
+    """Add to a book's counters in the caller's transaction (the caller commits)"""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    stmt = _upsert(db, {"book_id": book_id, **deltas})
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BookStats.book_id],
+        # Relative update, so concurrent writers never overwrite each other
+        set_={name: getattr(BookStats, name) + stmt.excluded[name] for name in deltas}
+    )
+    await db.execute(stmt)
+
+
+async def delete_user_activity(db: AsyncSession, user_id: int):
+    """Delete a user's reviews and favourites and take them off the counters (the caller commits)"""
+    reviews = await db.execute(
+        select(
+            Review.book_id,
+            func.coalesce(func.sum(Review.rating), 0),
+            func.count(Review.rating),
+            func.count(Review.id)
+        )
+        .where(Review.user_id == user_id)
+        .group_by(Review.book_id)
+    )
+    for book_id, rating_sum, rating_count, review_count in reviews.all():
+        await apply_delta(db, book_id, rating_sum=-rating_sum, rating_count=-rating_count, review_count=-review_count)
+
+    favourites = await db.execute(
+        select(book_favourites.c.book_id).where(book_favourites.c.user_id == user_id)
+    )
+    for book_id in favourites.scalars().all():
+        await apply_delta(db, book_id, favourite_count=-1)
+
+    await db.execute(delete(Review).where(Review.user_id == user_id))
+    await db.execute(delete(book_favourites).where(book_favourites.c.user_id == user_id))
+
+
+async def get_book_stats(book_id: int, db: AsyncSession) -> Optional[BookStats]:
+    return await db.get(BookStats, book_id)
+
+
+async def compute_book_stats(db: AsyncSession) -> Dict[int, Tuple[int, int, int, int]]:
+    """Counters of every book recomputed from review and book_favourites"""
+    reviews = (
+        select(
+            Review.book_id,
+            func.sum(Review.rating).label("rating_sum"),
+            func.count(Review.rating).label("rating_count"),
+            func.count(Review.id).label("review_count")
+        )
+        .group_by(Review.book_id)
+        .subquery()
+    )
+    favourites = (
+        select(book_favourites.c.book_id, func.count().label("favourite_count"))
+        .group_by(book_favourites.c.book_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            Book.id,
+            func.coalesce(reviews.c.rating_sum, 0),
+            func.coalesce(reviews.c.rating_count, 0),
+            func.coalesce(reviews.c.review_count, 0),
+            func.coalesce(favourites.c.favourite_count, 0)
+        )
+        .outerjoin(reviews, reviews.c.book_id == Book.id)
+        .outerjoin(favourites, favourites.c.book_id == Book.id)
+    )
+    return {row[0]: tuple(int(value) for value in row[1:]) for row in result.all()}
+
+
+async def rebuild_book_stats(db: AsyncSession, fix: bool = True) -> List[int]:
+    """Compare book_stats with the source tables; returns the ids that drifted and, with fix, corrects them"""
+    expected = await compute_book_stats(db)
+    stored = {
+        row[0]: tuple(row[1:])
+        for row in (await db.execute(
+            select(BookStats.book_id, *(getattr(BookStats, name) for name in COUNTERS))
+        )).all()
+    }
+
+    zero = (0,) * len(COUNTERS)
+    drifted = sorted(
+        book_id for book_id in expected.keys() | stored.keys()
+        if expected.get(book_id, zero) != stored.get(book_id, zero)
+    )
+    if fix and drifted:
+        for book_id in drifted:
+            values = dict(zip(COUNTERS, expected.get(book_id, zero)))
+            stmt = _upsert(db, {"book_id": book_id, **values})
+            await db.execute(stmt.on_conflict_do_update(index_elements=[BookStats.book_id], set_=values))
+        await db.commit()
+    return drifted
@@ -4,6 +4,7 @@ from sqlalchemy.future import select
 from models.user import User
 from models import Review
 from sqlalchemy.orm import selectinload
+from repositories import book_stats_repository
 
 
 
@@ -37,6 +38,10 @@ async def create_review(book_id: int, user_id: int, rating: int, comment: Option
     )
 
     db.add(new_review)
+    # Same transaction as the review itself
+    await book_stats_repository.apply_delta(
+        db, book_id, rating_sum=rating, rating_count=1, review_count=1
+    )
     await db.commit()
     await db.refresh(new_review)
 
@@ -1,8 +1,11 @@
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from models import User
+from models import User, Role
+from models.book import Script
+from models.event import Event
 from sqlalchemy.orm import selectinload
+from sqlalchemy import func
 
 async def get_user_by_id(user_id: int, db: AsyncSession) -> Optional[User]:
     stmt = select(User).where(User.id == user_id).options(selectinload(User.roles))
@@ -41,4 +44,24 @@ async def get_users_paginated(db: AsyncSession, offset: int, limit: int):
         .limit(limit)
     )
     result = await db.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
+    return result.scalars().all()
+
+
+async def get_platform_counts(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(
+            select(func.count(User.id)).scalar_subquery().label("total_users"),
+            select(func.count(Script.id)).scalar_subquery().label("total_scripts"),
+            select(func.count(Event.id)).scalar_subquery().label("total_events")
+        )
+    )
+    return dict(result.one()._mapping)
+
+
+async def count_users_by_role(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(Role.name, func.count(func.distinct(User.id)))
+        .join(User.roles)
+        .group_by(Role.name)
+    )
+    return {role.value: count for role, count in result.all()}
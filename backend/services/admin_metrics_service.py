@@ -0,0 +1,134 @@
+"""
+Admin dashboard metrics (/books/admin/metrics/summary and
+/users/admin/dashboard-metrics) served from an in-memory snapshot.
+
+The snapshot is rebuilt in the background every ``REFRESH_INTERVAL_SECONDS``
+and, debounced, shortly after writes that move the numbers (uploads,
+downloads, reviews, favourites, user changes). Admin requests never wait
+for the aggregates except on the very first call.
+
+A rebuild runs each aggregate concurrently on its own session: counts and
+top-k lists are computed in SQL (ORDER BY ... LIMIT), the rating lists and
+engagement sums come from ``book_stats``. Each worker keeps its own
+snapshot, so between workers the numbers differ by at most one interval.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from database import async_session
+from repositories import book_repository, user_repository
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL_SECONDS = 60
+STALE_DEBOUNCE_SECONDS = 5
+
+
+async def _run(query, *args):
+    async with async_session() as db:
+        return await query(db, *args)
+
+
+class AdminMetricsService:
+    """Periodically refreshed snapshot of platform-wide admin metrics"""
+
+    def __init__(self, interval: float = REFRESH_INTERVAL_SECONDS, debounce: float = STALE_DEBOUNCE_SECONDS):
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot: Optional[Dict] = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task = None
+        self._pending: asyncio.Task = None
+
+    async def refresh(self) -> Dict:
+        async with self._lock:
+            (total_books, top_authors, most_downloaded, top_rated, bottom_rated,
+             most_favourited, engagement, platform, roles) = await asyncio.gather(
+                _run(book_repository.count_books),
+                _run(book_repository.get_top_authors_by_uploads),
+                _run(book_repository.get_most_downloaded_books),
+                _run(book_repository.get_rated_books, True),
+                _run(book_repository.get_rated_books, False),
+                _run(book_repository.get_most_favourited_books),
+                _run(book_repository.get_engagement_totals),
+                _run(user_repository.get_platform_counts),
+                _run(user_repository.count_users_by_role)
+            )
+
+            per_book = (lambda total: round(total / total_books, 2)) if total_books else (lambda total: 0.0)
+            rating_count = engagement["rating_count"]
+            self._snapshot = {
+                "books": {
+                    "total_books": total_books,
+                    "top_authors_by_uploads": top_authors,
+                    "most_downloaded_books": most_downloaded,
+                    "top_rated_books": top_rated,
+                    "bottom_rated_books": bottom_rated,
+                    "most_favourited_books": most_favourited,
+                    "engagement": {
+                        "total_downloads": engagement["total_downloads"],
+                        "total_reviews": engagement["total_reviews"],
+                        "avg_global_rating": round(engagement["rating_sum"] / rating_count, 2) if rating_count else 0.0,
+                        "avg_favourites_per_book": per_book(engagement["total_favourites"]),
+                        "avg_reviews_per_book": per_book(engagement["total_reviews"])
+                    }
+                },
+                "dashboard": {
+                    "total_books": total_books,
+                    "total_users": platform["total_users"],
+                    "total_authors": roles.get("author", 0),
+                    "total_readers": roles.get("reader", 0),
+                    "total_scripts": platform["total_scripts"],
+                    "total_events": platform["total_events"]
+                }
+            }
+            return self._snapshot
+
+    async def _current(self) -> Dict:
+        if self._snapshot is None:
+            return await self.refresh()
+        return self._snapshot
+
+    async def get_book_summary(self) -> Dict:
+        return (await self._current())["books"]
+
+    async def get_dashboard_totals(self) -> Dict:
+        return (await self._current())["dashboard"]
+
+    def mark_stale(self):
+        """Schedule a refresh a few seconds from now; writes in between share it"""
+        if self._snapshot is None or (self._pending and not self._pending.done()):
+            return
+        self._pending = asyncio.create_task(self._refresh_later())
+
+    async def _refresh_later(self):
+        await asyncio.sleep(self.debounce)
+        await self._safe_refresh()
+
+    async def _safe_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"❌ Admin metrics refresh failed: {e}")
+
+    async def _loop(self):
+        while True:
+            await self._safe_refresh()
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        for task in (self._task, self._pending):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._pending = None
+
+
+admin_metrics = AdminMetricsService()
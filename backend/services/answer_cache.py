@@ -0,0 +1,80 @@
+"""
+LRU cache of chatbot answers keyed by normalized query.
+
+Entries are tagged with the knowledge base version they were computed
+against; a lookup with a different version clears the cache, so answers
+never outlive a change to the corpus.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+MAX_ENTRIES = 2048
+
+
+def normalize_query(keywords: Iterable[str]) -> str:
+    """Cache key: stop-word-free, lowercased keywords in sorted order"""
+    return " ".join(sorted(keywords))
+
+
+class AnswerCache:
+    """Size-bounded LRU of answers with hit-rate counters"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: str, version) -> Optional[Dict]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry)
+
+    def put(self, key: str, version, value: Dict):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = dict(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (e.g. after the knowledge base changed)"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def get_status(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
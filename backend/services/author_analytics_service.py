@@ -0,0 +1,50 @@
+"""
+Per-book metrics of an author's catalog for the author dashboards
+(/books/authored and /books/authored/summary).
+
+All of an author's books and their counters come back in one query (see
+``book_repository.get_author_book_metrics``). Results are cached per author
+for a short TTL, so dashboard refreshes do not go to the database every
+time. The author's own uploads invalidate the entry right away; downloads,
+reviews and favourites by others show up once it expires.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from repositories import book_repository
+
+AUTHOR_METRICS_TTL_SECONDS = 30
+MAX_CACHED_AUTHORS = 1000
+
+
+class AuthorAnalyticsService:
+    """Short-TTL, size-bounded cache in front of the author metrics query"""
+
+    def __init__(self, ttl: float = AUTHOR_METRICS_TTL_SECONDS, max_entries: int = MAX_CACHED_AUTHORS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # author_id -> (expires_at, metrics); least recently used first
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+
+    async def get_book_metrics(self, author_id: int, db: AsyncSession) -> List[Dict]:
+        """id, title, num_of_downloads, average_rating, review_count, favourite_count per book"""
+        entry = self._entries.get(author_id)
+        if entry and time.monotonic() < entry[0]:
+            self._entries.move_to_end(author_id)
+            return entry[1]
+
+        metrics = await book_repository.get_author_book_metrics(author_id, db)
+        self._entries[author_id] = (time.monotonic() + self.ttl, metrics)
+        self._entries.move_to_end(author_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return metrics
+
+    def invalidate(self, author_id: int):
+        self._entries.pop(author_id, None)
+
+
+author_analytics = AuthorAnalyticsService()
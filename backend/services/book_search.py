@@ -0,0 +1,189 @@
+"""
+Full-text search over the book catalog: title, author and description.
+
+On Postgres every book has a weighted ``search_vector`` (title A, author B,
+description C) behind a GIN index. Keywords become a prefix tsquery
+(``harr:* & pott:*``) and matches are ranked with ``ts_rank_cd``.
+
+Other databases (SQLite in development) use ``CatalogIndex``, an in-process
+inverted index with the same field weights and prefix matching, built from
+the books table on first use.
+
+The vector covers the author's name, which lives in ``users``, so it is
+maintained here rather than by a generated column. Call ``refresh_books``
+when a book is created or edited and ``refresh_author`` when an author is
+renamed, inside the caller's transaction.
+"""
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, false, func, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import engine
+from models import Book, User
+
+# Language-neutral parsing; titles are a mix of Bosnian and English
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+# Same weights as the tsvector labels A/B/C
+FIELD_WEIGHTS = {"title": 3, "author": 2, "description": 1}
+
+# Letters and digits only, so tokens are always safe inside a tsquery
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def to_prefix_query(keywords: str) -> Optional[str]:
+    """'Harry Pot' -> 'harry:* & pot:*'; None if there is nothing to search for"""
+    tokens = tokenize(keywords)
+    return " & ".join(f"{token}:*" for token in tokens) if tokens else None
+
+
+def search_vector_expression():
+    """Weighted tsvector of a book joined to its author"""
+    author_name = func.concat_ws(" ", User.username, User.first_name, User.last_name)
+    return (
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(Book.title, "")), literal_column("'A'"))
+        .op("||")(func.setweight(func.to_tsvector(SEARCH_CONFIG, author_name), literal_column("'B'")))
+        .op("||")(func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(Book.description, "")), literal_column("'C'")))
+    )
+
+
+class CatalogIndex:
+    """In-process inverted index with prefix lookups over a sorted vocabulary"""
+
+    def __init__(self):
+        # token -> {book_id: weight}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._book_tokens: Dict[int, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    def __len__(self):
+        return len(self._book_tokens)
+
+    def add(self, book_id: int, title: str, author: str, description: Optional[str]):
+        self.remove(book_id)
+        weights: Dict[str, int] = defaultdict(int)
+        for field, text in (("title", title), ("author", author), ("description", description)):
+            for token in set(tokenize(text)):
+                weights[token] += FIELD_WEIGHTS[field]
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._vocabulary_dirty = True
+            self._postings[token][book_id] = weight
+        self._book_tokens[book_id] = set(weights)
+
+    def remove(self, book_id: int):
+        for token in self._book_tokens.pop(book_id, ()):
+            postings = self._postings[token]
+            postings.pop(book_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+
+    def _expand(self, prefix: str) -> Iterable[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            yield self._vocabulary[position]
+            position += 1
+
+    def search(self, keywords: str) -> Dict[int, int]:
+        """Books matching every keyword as a prefix, with their scores"""
+        scores: Optional[Dict[int, int]] = None
+        for prefix in set(tokenize(keywords)):
+            term_scores: Dict[int, int] = {}
+            for token in self._expand(prefix):
+                for book_id, weight in self._postings[token].items():
+                    if weight > term_scores.get(book_id, 0):
+                        term_scores[book_id] = weight
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {book_id: score + term_scores[book_id]
+                          for book_id, score in scores.items() if book_id in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+
+class BookSearch:
+    """Keyword filter and relevance rank for catalog queries"""
+
+    def __init__(self):
+        self.index = CatalogIndex()
+        self._index_built = False
+
+    @property
+    def uses_postgres(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    async def _load(self, db: AsyncSession, condition=None) -> List[Tuple]:
+        stmt = select(
+            Book.id, Book.title, Book.description, User.username, User.first_name, User.last_name
+        ).join(User, Book.author_id == User.id)
+        if condition is not None:
+            stmt = stmt.where(condition)
+        return (await db.execute(stmt)).all()
+
+    def _index_rows(self, rows: Iterable[Tuple]):
+        for book_id, title, description, username, first_name, last_name in rows:
+            author = " ".join(filter(None, (username, first_name, last_name)))
+            self.index.add(book_id, title, author, description)
+
+    async def _ensure_index(self, db: AsyncSession):
+        if not self._index_built:
+            self._index_rows(await self._load(db))
+            self._index_built = True
+            print(f"✅ Catalog search index built ({len(self.index)} books)")
+
+    async def apply(self, stmt, keywords: str, db: AsyncSession):
+        """Restrict ``stmt`` to books matching ``keywords``; returns (stmt, rank expression or None)"""
+        prefix_query = to_prefix_query(keywords)
+        if prefix_query is None:
+            return stmt, None
+
+        if self.uses_postgres:
+            tsquery = func.to_tsquery(SEARCH_CONFIG, prefix_query)
+            stmt = stmt.where(Book.search_vector.op("@@")(tsquery))
+            return stmt, func.ts_rank_cd(Book.search_vector, tsquery)
+
+        await self._ensure_index(db)
+        scores = self.index.search(keywords)
+        if not scores:
+            return stmt.where(false()), None
+        stmt = stmt.where(Book.id.in_(scores))
+        return stmt, case(scores, value=Book.id, else_=0)
+
+    async def refresh_books(self, db: AsyncSession, book_ids: List[int]):
+        """Recompute the search data of the given books (the caller commits)"""
+        await self._refresh(db, Book.id.in_(book_ids))
+
+    async def refresh_author(self, db: AsyncSession, author_id: int):
+        """Recompute the search data of every book by an author (the caller commits)"""
+        await self._refresh(db, Book.author_id == author_id)
+
+    async def _refresh(self, db: AsyncSession, condition):
+        if self.uses_postgres:
+            await db.execute(
+                update(Book)
+                .where(Book.author_id == User.id, condition)
+                .values(search_vector=search_vector_expression())
+                .execution_options(synchronize_session=False)
+            )
+        elif self._index_built:
+            self._index_rows(await self._load(db, condition))
+
+
+book_search = BookSearch()
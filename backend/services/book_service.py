@@ -2,21 +2,33 @@ import os
 import shutil
 import uuid
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, UploadFile
 
 from schemas import BookCreate, BookAverageRating
-from models import Book, Review, Category, User, CategoryEnum
-from repositories import book_repository
+from models import Book, BookStats, Review, Category, User, CategoryEnum
+from repositories import book_repository, book_stats_repository
+from repositories.book_stats_repository import average_rating_expression
 from sqlalchemy.orm import selectinload, joinedload
-from sqlalchemy import func, select, or_
-from models import book_favourites 
+from sqlalchemy import false, func, select, tuple_
+from services.book_search import book_search
+from services.admin_metrics_service import admin_metrics
+from services.author_analytics_service import author_analytics
+from services.pagination import encode_cursor, decode_cursor, estimate_count
+
+# Catalog page sizes
+BOOK_PAGE_SIZE = 50
+MAX_BOOK_PAGE_SIZE = 200
 
 async def create_book_service(book_data: BookCreate, db: AsyncSession) -> Book:
     book = await book_repository.create_book(book_data, db)
     if not book:
         raise HTTPException(status_code=404, detail=f"Author with ID {book_data.author_id} not found")
+    await book_search.refresh_books(db, [book.id])
+    await db.commit()
+    author_analytics.invalidate(book.author_id)
+    admin_metrics.mark_stale()
     return book
 
 async def get_all_books_service(
@@ -25,70 +37,114 @@ async def get_all_books_service(
     author: Optional[str] = None,
     keywords: Optional[str] = None,
     sort: Optional[str] = None,
-    direction: Optional[str] = "asc"
-) -> List[Book]:
-    avg_rating_subq = (
-        select(
-            Review.book_id,
-            func.avg(Review.rating).label("average_rating"),
-            func.count(Review.id).label("review_count")
-        )
-        .group_by(Review.book_id)
-        .subquery()
-    )
-
+    direction: Optional[str] = "asc",
+    cursor: Optional[str] = None,
+    limit: int = BOOK_PAGE_SIZE,
+    with_total: bool = False,
+    min_rating: Optional[float] = None,
+    favourited_by: Optional[int] = None
+) -> Tuple[List[Book], Optional[str], Optional[int]]:
+    """One page of the catalog, the cursor of the next page and (optionally) an estimated total"""
+    average_rating = average_rating_expression()
+
+    # Counters maintained on write, see repositories/book_stats_repository.py
     stmt = (
         select(Book)
-        .options(
-            joinedload(Book.author).selectinload(User.roles),
-            selectinload(Book.categories)
-        )
-        .join(avg_rating_subq, Book.id == avg_rating_subq.c.book_id, isouter=True)
-        .add_columns(
-            avg_rating_subq.c.average_rating,
-            avg_rating_subq.c.review_count
-        )
+        .join(User, Book.author_id == User.id)
+        .join(BookStats, Book.id == BookStats.book_id, isouter=True)
     )
 
     # apply filters...
     if genre:
         try:
             enum_values = [CategoryEnum(g) for g in genre]
-            stmt = stmt.join(Book.categories).where(Category.category.in_(enum_values))
+            # EXISTS, so a book in several of the genres is listed once
+            stmt = stmt.where(Book.categories.any(Category.category.in_(enum_values)))
         except ValueError:
-            stmt = stmt.where(False)
+            stmt = stmt.where(false())
 
     if author:
-        stmt = stmt.join(Book.author).where(User.username.ilike(f"%{author}%"))
+        stmt = stmt.where(User.username.ilike(f"%{author}%"))
 
+    if min_rating is not None:
+        stmt = stmt.where(average_rating >= min_rating)
+
+    if favourited_by is not None:
+        stmt = stmt.where(Book.favourited_by.any(User.id == favourited_by))
+
+    rank = None
     if keywords:
-        stmt = stmt.where(
-            or_(
-                Book.title.ilike(f"%{keywords}%"),
-                Book.path.ilike(f"%{keywords}%")
-            )
-        )
+        # Full-text match on title, author and description (services/book_search.py)
+        stmt, rank = await book_search.apply(stmt, keywords, db)
+
+    total = await estimate_count(db, stmt) if with_total else None
+
+    # Sort key and its cursor type; Book.id breaks ties in the same direction
+    sort_keys = {
+        "title": (Book.title, str),
+        "downloads": (Book.num_of_downloads, int),
+        "author": (User.username, str),
+        "rating": (func.coalesce(average_rating, 0), float),
+    }
+    descending = direction == "desc"
+    if sort in sort_keys:
+        sort_key, key_type = sort_keys[sort]
+    elif rank is not None:
+        # Best matches first unless another order was asked for
+        sort, sort_key, key_type, descending = "relevance", rank, float, True
+    else:
+        sort, sort_key, key_type = "id", None, int
 
-    if sort == "title":
-        stmt = stmt.order_by(Book.title.asc() if direction == "asc" else Book.title.desc())
-    elif sort == "downloads":
-        stmt = stmt.order_by(Book.num_of_downloads.asc() if direction == "asc" else Book.num_of_downloads.desc())
-    elif sort == "author":
-        if "users" not in str(stmt):
-            stmt = stmt.join(Book.author)
-        stmt = stmt.order_by(User.username.asc() if direction == "asc" else User.username.desc())
+    stmt = (
+        stmt
+        .options(
+            joinedload(Book.author).selectinload(User.roles),
+            selectinload(Book.categories)
+        )
+        .add_columns(
+            average_rating,
+            BookStats.review_count,
+            (sort_key if sort_key is not None else Book.id).label("sort_key")
+        )
+    )
 
-    result = await db.execute(stmt)
+    if cursor:
+        cursor_sort, cursor_direction, last_key, last_id = decode_cursor(cursor, str, str, key_type, int)
+        if cursor_sort != sort or cursor_direction != ("desc" if descending else "asc"):
+            raise HTTPException(status_code=400, detail="Cursor does not match the sort order")
+        if sort_key is None:
+            position = Book.id < last_id if descending else Book.id > last_id
+        elif descending:
+            position = tuple_(sort_key, Book.id) < tuple_(last_key, last_id)
+        else:
+            position = tuple_(sort_key, Book.id) > tuple_(last_key, last_id)
+        stmt = stmt.where(position)
+
+    order = [sort_key, Book.id] if sort_key is not None else [Book.id]
+    stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column in order))
+
+    result = await db.execute(stmt.limit(limit + 1))
     rows = result.all()
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_book, last_sort_key = rows[-1][0], rows[-1][3]
+        next_cursor = encode_cursor(
+            sort,
+            "desc" if descending else "asc",
+            last_sort_key if sort_key is not None else None,
+            last_book.id
+        )
+
     # manually assign rating data to each book object
     books = []
-    for book, avg_rating, review_count in rows:
+    for book, avg_rating, review_count, _ in rows:
         book.average_rating = avg_rating
         book.review_count = review_count
         books.append(book)
 
-    return books
+    return books, next_cursor, total
 
 async def get_book_by_id_service(book_id: int, db: AsyncSession) -> Book:
     book = await book_repository.get_book_by_id(book_id, db)
@@ -149,8 +205,11 @@ async def create_book_in_db(
 
     db.add(new_book)            # ✅ Tek sad dodaj knjigu
     await db.flush()            # ✅ Sad flush
+    await book_search.refresh_books(db, [new_book.id])
     await db.commit()
     await db.refresh(new_book)
+    author_analytics.invalidate(new_book.author_id)
+    admin_metrics.mark_stale()
     print(f"[DB] Nova knjiga dodana u bazu: {new_book}")
     return new_book
 
@@ -212,22 +271,15 @@ async def service_create_book_with_upload(
     return created_book
 
 async def get_average_book_rating(book_id: int, db: AsyncSession) -> float | None:
-    stmt = select(func.avg(Review.rating)).where(Review.book_id == book_id)
-    result = await db.execute(stmt)
-    avg = result.scalar_one_or_none()
-    return float(avg) if avg is not None else None
+    stats = await book_stats_repository.get_book_stats(book_id, db)
+    if not stats or not stats.rating_count:
+        return None
+    return stats.rating_sum / stats.rating_count
 
 async def get_review_count(book_id: int, db: AsyncSession) -> int:
-    result = await db.execute(
-        select(func.count(Review.id)).where(Review.book_id == book_id)
-    )
-    return result.scalar()
+    stats = await book_stats_repository.get_book_stats(book_id, db)
+    return stats.review_count if stats else 0
 
 async def get_favourite_count(book_id: int, db: AsyncSession) -> int:
-    result = await db.execute(
-        select(func.count()).select_from(book_favourites).where(book_favourites.c.book_id == book_id)
-    )
-    return result.scalar()
-
-async def get_admin_metrics_summary_service(db: AsyncSession):
-    return await book_repository.get_admin_book_metrics_summary(db)
\ No newline at end of file
+    stats = await book_stats_repository.get_book_stats(book_id, db)
+    return stats.favourite_count if stats else 0
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Pub/sub backplane for chat events.
+
+Chat managers never deliver straight to their own sockets; they publish to
+the backplane and deliver whatever it hands back, so an event reaches the
+users connected to every worker.
+
+* ``InMemoryBackplane`` dispatches within the process (single worker, dev).
+* ``PostgresBackplane`` uses Postgres LISTEN/NOTIFY on the application
+  database. Payloads over the NOTIFY size limit are parked in a small
+  unlogged table and only their id is sent.
+
+``create_backplane`` picks one from CHAT_BACKPLANE ("memory" or "postgres").
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+# Identifies this process in presence and debugging output
+WORKER_ID = uuid.uuid4().hex
+
+
+class ChatBackplane:
+    """Interface shared by the backplane implementations"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.worker_id = WORKER_ID
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Call ``handler`` for every event published on ``channel`` by any worker"""
+        self._handlers[channel].append(handler)
+
+    async def _dispatch(self, channel: str, message: dict):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"❌ Chat backplane handler for '{channel}' failed: {e}")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: dict):
+        raise NotImplementedError
+
+    def get_status(self) -> Dict:
+        return {"backend": type(self).__name__, "worker_id": self.worker_id}
+
+
+class InMemoryBackplane(ChatBackplane):
+    """Delivers events to subscribers in this process only"""
+
+    async def publish(self, channel: str, message: dict):
+        await self._dispatch(channel, message)
+
+
+class PostgresBackplane(ChatBackplane):
+    """Fans events out to every worker through Postgres LISTEN/NOTIFY"""
+
+    CHANNEL = "bookify_chat"
+    # NOTIFY payloads must stay below 8000 bytes
+    MAX_NOTIFY_BYTES = 7500
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._pool = None
+        self._listener = None
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._consumer: Optional[asyncio.Task] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._parked = 0
+
+    async def start(self):
+        import asyncpg
+
+        self._stopping = False
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=4)
+        await self._pool.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS chat_backplane_payloads (
+                id BIGSERIAL PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        self._consumer = asyncio.create_task(self._consume())
+        await self._listen()
+        logger.info(f"✅ Chat backplane listening on '{self.CHANNEL}'")
+
+    async def _listen(self):
+        import asyncpg
+
+        self._listener = await asyncpg.connect(self.dsn)
+        self._listener.add_termination_listener(self._on_terminated)
+        await self._listener.add_listener(self.CHANNEL, self._on_notify)
+
+    def _on_terminated(self, connection):
+        if not self._stopping and (self._reconnect is None or self._reconnect.done()):
+            logger.warning("⚠️ Chat backplane listener lost, reconnecting")
+            self._reconnect = asyncio.create_task(self._relisten())
+
+    async def _relisten(self):
+        while not self._stopping:
+            try:
+                await self._listen()
+                return
+            except Exception as e:
+                logger.error(f"❌ Chat backplane reconnect failed: {e}")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        # A single consumer keeps events in NOTIFY order
+        self._inbox.put_nowait(payload)
+
+    async def _consume(self):
+        while True:
+            payload = await self._inbox.get()
+            try:
+                envelope = json.loads(payload)
+                if "ref" in envelope:
+                    stored = await self._pool.fetchval(
+                        "SELECT payload FROM chat_backplane_payloads WHERE id = $1", envelope["ref"]
+                    )
+                    if stored is None:
+                        continue
+                    envelope = json.loads(stored)
+                await self._dispatch(envelope["channel"], envelope["message"])
+            except Exception as e:
+                logger.error(f"❌ Could not handle chat backplane event: {e}")
+
+    async def publish(self, channel: str, message: dict):
+        payload = json.dumps({"channel": channel, "message": message}, ensure_ascii=False)
+        if len(payload.encode("utf-8")) > self.MAX_NOTIFY_BYTES:
+            payload = await self._park(payload)
+        await self._pool.execute("SELECT pg_notify($1, $2)", self.CHANNEL, payload)
+
+    async def _park(self, payload: str) -> str:
+        """Store an oversized payload and return the envelope that points to it"""
+        ref = await self._pool.fetchval(
+            "INSERT INTO chat_backplane_payloads (payload) VALUES ($1) RETURNING id", payload
+        )
+        self._parked += 1
+        if self._parked % 100 == 0:
+            await self._pool.execute(
+                "DELETE FROM chat_backplane_payloads WHERE created_at < now() - interval '5 minutes'"
+            )
+        return json.dumps({"ref": ref})
+
+    async def stop(self):
+        self._stopping = True
+        for task in (self._reconnect, self._consumer):
+            if task:
+                task.cancel()
+        if self._listener and not self._listener.is_closed():
+            await self._listener.close()
+        if self._pool:
+            await self._pool.close()
+
+    def get_status(self) -> Dict:
+        return {
+            **super().get_status(),
+            "listening": bool(self._listener and not self._listener.is_closed()),
+            "pending_events": self._inbox.qsize()
+        }
+
+
+def _postgres_dsn() -> str:
+    """DATABASE_URL without the SQLAlchemy driver suffix (postgresql+asyncpg -> postgresql)"""
+    from sqlalchemy.engine import make_url
+
+    url = make_url(os.getenv("DATABASE_URL"))
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def create_backplane(backend: Optional[str] = None) -> ChatBackplane:
+    """Build the backplane selected by CHAT_BACKPLANE"""
+    backend = (backend or os.getenv("CHAT_BACKPLANE", "memory")).lower()
+    if backend == "memory":
+        return InMemoryBackplane()
+    if backend == "postgres":
+        return PostgresBackplane(_postgres_dsn())
+    raise ValueError(f"Unknown chat backplane '{backend}'")
+
+
+chat_backplane = create_backplane()
@@ -0,0 +1,270 @@
+"""
+Conversation history storage for the RAG chatbot.
+
+``InMemorySessionStore`` is a per-process LRU with idle expiry and a memory
+cap. ``SqliteSessionStore`` keeps history in a SQLite file so every worker
+on the host sees the same sessions. ``create_session_store`` picks one from
+the CHATBOT_SESSION_STORE environment variable ("memory" or "sqlite").
+
+The store methods are coroutines; the SQLite backend runs its queries on a
+worker thread so a busy database file never blocks the event loop.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Exchanges kept per session
+MAX_HISTORY = 10
+# Sessions untouched for this long are dropped
+IDLE_TTL_SECONDS = 30 * 60
+MAX_SESSIONS = 10_000
+MAX_MEMORY_BYTES = 16 * 1024 * 1024
+# The SQLite store sweeps idle sessions and recounts its rows at most this often
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class SessionStore:
+    """Interface shared by the session store backends"""
+
+    async def append(self, session_id: str, entry: Dict) -> None:
+        raise NotImplementedError
+
+    async def get(self, session_id: str) -> List[Dict]:
+        raise NotImplementedError
+
+    async def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def get_status(self) -> Dict:
+        return {"backend": type(self).__name__, "active_sessions": len(self)}
+
+
+def _entry_size(entry: Dict) -> int:
+    """Rough memory footprint of a history entry"""
+    return sum(len(str(key)) + len(str(value)) for key, value in entry.items())
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local LRU store with idle TTL and a memory cap"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, idle_ttl: float = IDLE_TTL_SECONDS,
+                 max_bytes: int = MAX_MEMORY_BYTES, max_history: int = MAX_HISTORY):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.max_history = max_history
+        # session_id -> (last_activity, entries, size); least recently used first
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _drop(self, session_id: str):
+        _, _, size = self._sessions.pop(session_id)
+        self._bytes -= size
+
+    def _evict(self, now: float):
+        # Idle sessions sit at the front, so stop at the first live one
+        while self._sessions:
+            session_id, (last_activity, _, _) = next(iter(self._sessions.items()))
+            if now - last_activity <= self.idle_ttl:
+                break
+            self._drop(session_id)
+            self.evictions += 1
+
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._sessions)))
+            self.evictions += 1
+
+    async def append(self, session_id: str, entry: Dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            _, entries, old_size = self._sessions.pop(session_id, (now, [], 0))
+            entries.append(entry)
+            size = old_size + _entry_size(entry)
+            while len(entries) > self.max_history:
+                size -= _entry_size(entries.pop(0))
+
+            # Re-inserting moves the session to the most recently used end
+            self._sessions[session_id] = [now, entries, size]
+            self._bytes += size - old_size
+            self._evict(now)
+
+    async def get(self, session_id: str) -> List[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session[0] = now
+            self._sessions.move_to_end(session_id)
+            return list(session[1])
+
+    async def delete(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def get_status(self) -> Dict:
+        return {
+            **super().get_status(),
+            "memory_bytes": self._bytes,
+            "evictions": self.evictions
+        }
+
+
+class SqliteSessionStore(SessionStore):
+    """Session history in a SQLite file shared by all workers on the host"""
+
+    def __init__(self, path: str, max_sessions: int = MAX_SESSIONS, idle_ttl: float = IDLE_TTL_SECONDS,
+                 max_history: int = MAX_HISTORY, sweep_interval: float = SWEEP_INTERVAL_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_history = max_history
+        self.sweep_interval = sweep_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The store is built on a warm-up thread and used from the event loop
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS chatbot_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    last_activity REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_chatbot_sessions_last_activity
+                    ON chatbot_sessions (last_activity);
+                CREATE TABLE IF NOT EXISTS chatbot_session_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    entry TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_chatbot_session_messages_session
+                    ON chatbot_session_messages (session_id, id);
+            """)
+            # Sessions in the file, approximately: other workers' inserts show up at the next sweep
+            self._session_count = self._conn.execute("SELECT COUNT(*) FROM chatbot_sessions").fetchone()[0]
+            self._last_sweep = time.time()
+
+    def __len__(self) -> int:
+        with self._lock:
+            cutoff = time.time() - self.idle_ttl
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chatbot_sessions WHERE last_activity >= ?", (cutoff,)
+            ).fetchone()[0]
+
+    def _evict(self, now: float):
+        # Idle sessions go in a periodic sweep, which also resyncs the session count
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self._conn.execute(
+                "DELETE FROM chatbot_session_messages WHERE session_id IN "
+                "(SELECT session_id FROM chatbot_sessions WHERE last_activity < ?)",
+                (now - self.idle_ttl,)
+            )
+            self._conn.execute("DELETE FROM chatbot_sessions WHERE last_activity < ?", (now - self.idle_ttl,))
+            self._session_count = self._conn.execute("SELECT COUNT(*) FROM chatbot_sessions").fetchone()[0]
+
+        if self._session_count > self.max_sessions:
+            # Confirm before trimming; the count may include sessions another worker removed
+            self._session_count = self._conn.execute("SELECT COUNT(*) FROM chatbot_sessions").fetchone()[0]
+            overflow = self._session_count - self.max_sessions
+            if overflow > 0:
+                oldest = [row[0] for row in self._conn.execute(
+                    "SELECT session_id FROM chatbot_sessions ORDER BY last_activity LIMIT ?", (overflow,)
+                )]
+                self._conn.executemany("DELETE FROM chatbot_session_messages WHERE session_id = ?", [(s,) for s in oldest])
+                self._conn.executemany("DELETE FROM chatbot_sessions WHERE session_id = ?", [(s,) for s in oldest])
+                self._session_count -= len(oldest)
+
+    def _append(self, session_id: str, entry: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT last_activity FROM chatbot_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None:
+                    self._session_count += 1
+                elif now - row[0] > self.idle_ttl:
+                    # Expired but not swept yet; start the history over
+                    self._conn.execute("DELETE FROM chatbot_session_messages WHERE session_id = ?", (session_id,))
+                self._conn.execute(
+                    "INSERT INTO chatbot_session_messages (session_id, entry) VALUES (?, ?)",
+                    (session_id, json.dumps(entry))
+                )
+                self._conn.execute(
+                    "INSERT INTO chatbot_sessions (session_id, last_activity) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_activity = excluded.last_activity",
+                    (session_id, now)
+                )
+                # Keep only the most recent exchanges
+                self._conn.execute(
+                    "DELETE FROM chatbot_session_messages WHERE session_id = ? AND id NOT IN "
+                    "(SELECT id FROM chatbot_session_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                    (session_id, session_id, self.max_history)
+                )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _get(self, session_id: str) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_activity FROM chatbot_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or now - row[0] > self.idle_ttl:
+                return []
+            self._conn.execute(
+                "UPDATE chatbot_sessions SET last_activity = ? WHERE session_id = ?", (now, session_id)
+            )
+            rows = self._conn.execute(
+                "SELECT entry FROM chatbot_session_messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return [json.loads(entry) for (entry,) in rows]
+
+    def _delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chatbot_session_messages WHERE session_id = ?", (session_id,))
+            deleted = self._conn.execute("DELETE FROM chatbot_sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._session_count = max(self._session_count - deleted, 0)
+
+    async def append(self, session_id: str, entry: Dict) -> None:
+        await asyncio.to_thread(self._append, session_id, entry)
+
+    async def get(self, session_id: str) -> List[Dict]:
+        return await asyncio.to_thread(self._get, session_id)
+
+    async def delete(self, session_id: str) -> None:
+        await asyncio.to_thread(self._delete, session_id)
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """Build the session store selected by CHATBOT_SESSION_STORE"""
+    backend = (backend or os.getenv("CHATBOT_SESSION_STORE", "memory")).lower()
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "sqlite":
+        return SqliteSessionStore(os.getenv("CHATBOT_SESSION_DB", "./data/chatbot_sessions.db"))
+    raise ValueError(f"Unknown chatbot session store '{backend}'")
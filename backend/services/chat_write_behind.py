@@ -0,0 +1,187 @@
+"""
+Optional write-behind persistence for chat messages (CHAT_WRITE_BEHIND=1).
+
+A message gets its id and timestamp immediately, so it can be broadcast
+before it is stored. Ids are reserved from the table's Postgres sequence in
+blocks. A background task bulk-inserts queued messages in small batches,
+waiting at most ``max_delay`` seconds, and the queue is flushed on
+shutdown. Without the flag (or on a database without sequences) messages
+are committed inline as before.
+
+Callers validate messages before queueing them. A batch that still violates
+a constraint is retried row by row and the offending rows are set aside in
+``dead_letters``; other failures are retried with capped backoff a limited
+number of times, so one bad batch never stalls the queue behind it.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Tuple
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session, engine
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+MAX_DELAY_SECONDS = 0.05
+ID_BLOCK_SIZE = 100
+MAX_PENDING = 10_000
+RETRY_DELAY_SECONDS = 1.0
+MAX_RETRY_DELAY_SECONDS = 10.0
+MAX_RETRIES = 5
+MAX_DEAD_LETTERS = 1000
+STOP_TIMEOUT_SECONDS = 30
+
+
+class ChatWriteBehind:
+    """Assigns ids up front and inserts chat messages in background batches"""
+
+    def __init__(self, batch_size: int = BATCH_SIZE, max_delay: float = MAX_DELAY_SECONDS,
+                 id_block_size: int = ID_BLOCK_SIZE):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.id_block_size = id_block_size
+        self.enabled = False
+        self._queue: asyncio.Queue = None
+        self._task: asyncio.Task = None
+        # table name -> ids reserved from its sequence but not handed out yet
+        self._ids: Dict[str, Deque[int]] = defaultdict(deque)
+        self._id_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.written = 0
+        # Rows that could not be stored, newest last, for inspection
+        self.dead_letters: Deque[Tuple[str, Dict]] = deque(maxlen=MAX_DEAD_LETTERS)
+        self.dropped = 0
+
+    async def start(self):
+        if os.getenv("CHAT_WRITE_BEHIND", "0").lower() not in ("1", "true", "yes"):
+            return
+        if engine.dialect.name != "postgresql":
+            logger.warning("⚠️ Chat write-behind needs Postgres sequences; writing messages inline")
+            return
+
+        self._queue = asyncio.Queue(maxsize=MAX_PENDING)
+        self._task = asyncio.create_task(self._run())
+        self.enabled = True
+        logger.info("✅ Chat write-behind enabled")
+
+    async def _next_id(self, table_name: str) -> int:
+        ids = self._ids[table_name]
+        if not ids:
+            async with self._id_locks[table_name]:
+                if not ids:
+                    async with async_session() as db:
+                        result = await db.execute(
+                            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                                 "FROM generate_series(1, :count)"),
+                            {"table": table_name, "count": self.id_block_size}
+                        )
+                        ids.extend(row[0] for row in result)
+        return ids.popleft()
+
+    async def persist(self, db: AsyncSession, model, **values):
+        """Store a message and return it with id and timestamp set"""
+        if not self.enabled:
+            message = model(**values)
+            db.add(message)
+            await db.commit()
+            return message
+
+        table = model.__table__
+        values["id"] = await self._next_id(table.name)
+        values.setdefault("timestamp", datetime.utcnow())
+        # Waits only if the writer has fallen MAX_PENDING messages behind
+        await self._queue.put((table, values))
+        return model(**values)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _write(self, batch: List[Tuple]):
+        rows_by_table = defaultdict(list)
+        for table, values in batch:
+            rows_by_table[table].append(values)
+
+        # The messages were already delivered to clients, so retry a few times
+        delay = RETRY_DELAY_SECONDS
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                async with async_session() as db:
+                    for table, rows in rows_by_table.items():
+                        await db.execute(insert(table), rows)
+                    await db.commit()
+                self.written += len(batch)
+                return
+            except IntegrityError as e:
+                logger.warning(f"⚠️ Chat write-behind batch of {len(batch)} messages rejected, retrying row by row: {e}")
+                await self._write_rows(batch)
+                return
+            except Exception as e:
+                logger.error(f"❌ Chat write-behind insert of {len(batch)} messages failed "
+                             f"(attempt {attempt}/{MAX_RETRIES}): {e}")
+                if attempt < MAX_RETRIES:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+        for table, values in batch:
+            self._dead_letter(table, values)
+
+    async def _write_rows(self, batch: List[Tuple]):
+        for table, values in batch:
+            try:
+                async with async_session() as db:
+                    await db.execute(insert(table), [values])
+                    await db.commit()
+                self.written += 1
+            except Exception as e:
+                logger.error(f"❌ Chat write-behind dropped message {values.get('id')} from {table.name}: {e}")
+                self._dead_letter(table, values)
+
+    def _dead_letter(self, table, values: Dict):
+        self.dead_letters.append((table.name, values))
+        self.dropped += 1
+
+    async def stop(self):
+        """Flush every queued message (called on shutdown)"""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), STOP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Chat write-behind stopped with {self._queue.qsize()} messages unwritten")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self.enabled = False
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped
+        }
+
+
+chat_write_behind = ChatWriteBehind()
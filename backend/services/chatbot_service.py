@@ -1,20 +1,15 @@
 import logging
-from services.rag_chatbot_service import RagChatbotService
+from services.rag_chatbot_service import chatbot_provider
 
 logger = logging.getLogger(__name__)
 
 class ChatbotService:
-    """Legacy wrapper for backward compatibility"""
-    
-    def __init__(self):
-        try:
-            self.service = RagChatbotService()
-        except:
-            self.service = None
+    """Legacy wrapper for backward compatibility, backed by the shared chatbot service"""
     
     async def get_response(self, query: str, session_id: str, user_context: dict = None):
-        if self.service:
-            return await self.service.get_response(query, session_id, user_context)
+        service = await chatbot_provider.get()
+        if service:
+            return await service.get_response(query, session_id, user_context)
         return {
             "answer": "Service unavailable",
             "sources": ["System"],
@@ -23,12 +18,14 @@ class ChatbotService:
         }
     
     async def get_streaming_response(self, query: str, session_id: str):
-        if self.service:
-            async for chunk in self.service.get_streaming_response(query, session_id):
+        service = await chatbot_provider.get()
+        if service:
+            async for chunk in service.get_streaming_response(query, session_id):
                 yield chunk
         else:
             yield {"type": "error", "content": "Service unavailable", "finished": True}
     
     async def save_feedback(self, feedback_data: dict):
-        if self.service:
-            await self.service.save_feedback(feedback_data)
\ No newline at end of file
+        service = await chatbot_provider.get()
+        if service:
+            await service.save_feedback(feedback_data)
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+On-disk corpus for the knowledge base vector store.
+
+Layout of ``data/vector_db``:
+
+* ``documents.log``  append-only JSON lines, one per document
+* ``documents.idx``  append-only fixed-width (offset, length) entries; a
+  document exists once its index entry is written, so a crash can only
+  leave unreferenced bytes at the end of the log
+* ``segments/<generation>/``  sealed postings for documents ``[0, num_docs)``
+  stored as ``.npy`` arrays that are memory-mapped read-only
+* ``segments/CURRENT``  manifest naming the live segment generation
+
+All files are opened read-only through ``mmap``, so every uvicorn worker
+shares the same pages through the OS page cache. Writers serialize on an
+advisory lock file.
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines run a single worker
+    fcntl = None
+
+INDEX_ENTRY = struct.Struct("<QQ")  # offset, length
+
+
+def _map_file(path: str):
+    """Read-only mapping of a file; empty files cannot be mapped"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class CorpusLog:
+    """Append-only document log with an offsets index"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.log_path = os.path.join(directory, "documents.log")
+        self.idx_path = os.path.join(directory, "documents.idx")
+        self.lock_path = os.path.join(directory, "corpus.lock")
+
+        for path in (self.log_path, self.idx_path, self.lock_path):
+            open(path, "ab").close()
+
+        self._count = 0
+        self._log_map = b""
+        self._idx_map = b""
+        self.remap()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @contextmanager
+    def locked(self):
+        """Exclusive lock shared by every process writing to this corpus"""
+        with open(self.lock_path, "ab") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def remap(self) -> int:
+        """Map records appended since the last call (by any process); returns the count"""
+        count = os.path.getsize(self.idx_path) // INDEX_ENTRY.size
+        if count != self._count:
+            # The log is always written before the index, so map it second
+            self._idx_map = _map_file(self.idx_path)
+            self._log_map = _map_file(self.log_path)
+            self._count = count
+        return count
+
+    def read(self, doc_id: int) -> Dict:
+        """Decode one record straight from the mapped log"""
+        if not 0 <= doc_id < self._count:
+            raise IndexError(doc_id)
+        offset, length = INDEX_ENTRY.unpack_from(self._idx_map, doc_id * INDEX_ENTRY.size)
+        return json.loads(self._log_map[offset:offset + length])
+
+    def append(self, records: List[Dict], expected_count: Optional[int] = None) -> bool:
+        """Append records; with ``expected_count`` only if the corpus still has that many"""
+        with self.locked():
+            with open(self.idx_path, "r+b") as idx_file, open(self.log_path, "ab") as log_file:
+                # Drop a torn index entry left by a crashed writer
+                count = os.fstat(idx_file.fileno()).st_size // INDEX_ENTRY.size
+                if expected_count is not None and count != expected_count:
+                    return False
+
+                offset = os.fstat(log_file.fileno()).st_size
+                entries = bytearray()
+                chunks = []
+                for record in records:
+                    data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                    entries += INDEX_ENTRY.pack(offset, len(data))
+                    chunks.append(data + b"\n")
+                    offset += len(data) + 1
+
+                log_file.write(b"".join(chunks))
+                log_file.flush()
+                os.fsync(log_file.fileno())
+
+                idx_file.truncate(count * INDEX_ENTRY.size)
+                idx_file.seek(count * INDEX_ENTRY.size)
+                idx_file.write(entries)
+                idx_file.flush()
+                os.fsync(idx_file.fileno())
+        return True
+
+
+class PostingsSegment:
+    """Read-only postings lists backed by memory-mapped arrays"""
+
+    def __init__(self, vocabulary: Dict[str, int], indptr: np.ndarray, doc_ids: np.ndarray,
+                 tfs: Optional[np.ndarray] = None):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        # None means every posting has frequency 1
+        self.tfs = tfs
+
+    def doc_freq(self, term: str) -> int:
+        row = self.vocabulary.get(term)
+        if row is None:
+            return 0
+        return int(self.indptr[row + 1] - self.indptr[row])
+
+    def row(self, term: str) -> Optional[Dict[int, int]]:
+        """Postings of a term as {doc_id: tf}, or None if the term is not in the segment"""
+        row = self.vocabulary.get(term)
+        if row is None:
+            return None
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        doc_ids = self.doc_ids[start:end].tolist()
+        if self.tfs is None:
+            return dict.fromkeys(doc_ids, 1)
+        return dict(zip(doc_ids, self.tfs[start:end].tolist()))
+
+
+class Segment:
+    """A sealed generation of the index covering documents [0, num_docs)"""
+
+    def __init__(self, generation: int, num_docs: int, total_length: int,
+                 keywords: PostingsSegment, words: PostingsSegment, doc_lengths: np.ndarray):
+        self.generation = generation
+        self.num_docs = num_docs
+        self.total_length = total_length
+        self.keywords = keywords
+        self.words = words
+        self.doc_lengths = doc_lengths
+
+
+def _segments_dir(directory: str) -> str:
+    return os.path.join(directory, "segments")
+
+
+def _load_postings(path: str, name: str, with_tfs: bool) -> PostingsSegment:
+    with open(os.path.join(path, f"{name}.vocab.json"), encoding="utf-8") as f:
+        terms = json.load(f)
+    return PostingsSegment(
+        {term: row for row, term in enumerate(terms)},
+        np.load(os.path.join(path, f"{name}.indptr.npy"), mmap_mode="r"),
+        np.load(os.path.join(path, f"{name}.docs.npy"), mmap_mode="r"),
+        np.load(os.path.join(path, f"{name}.tfs.npy"), mmap_mode="r") if with_tfs else None,
+    )
+
+
+def segment_stamp(directory: str) -> Optional[int]:
+    """Modification time of the segment manifest, to detect compactions by other workers"""
+    try:
+        return os.stat(os.path.join(_segments_dir(directory), "CURRENT")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_current_segment(directory: str) -> Optional[Segment]:
+    """Map the segment named by the manifest, if one has been written"""
+    manifest_path = os.path.join(_segments_dir(directory), "CURRENT")
+
+    # A concurrent compaction can delete the generation we just read; re-read the manifest
+    for _ in range(3):
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        path = os.path.join(_segments_dir(directory), f"{manifest['generation']:06d}")
+        try:
+            return Segment(
+                generation=manifest["generation"],
+                num_docs=manifest["num_docs"],
+                total_length=manifest["total_length"],
+                keywords=_load_postings(path, "keywords", with_tfs=True),
+                words=_load_postings(path, "words", with_tfs=False),
+                doc_lengths=np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode="r"),
+            )
+        except FileNotFoundError:
+            continue
+
+    raise RuntimeError(f"Could not load the current index segment from {directory}")
+
+
+def _write_postings(path: str, name: str, postings, with_tfs: bool):
+    terms = list(postings)
+    rows = [postings[term] for term in terms]
+
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+
+    doc_ids = np.fromiter((d for row in rows for d in row), dtype=np.int64, count=int(indptr[-1]))
+    np.save(os.path.join(path, f"{name}.docs.npy"), doc_ids)
+    np.save(os.path.join(path, f"{name}.indptr.npy"), indptr)
+    if with_tfs:
+        tfs = np.fromiter((tf for row in rows for tf in row.values()), dtype=np.int32, count=int(indptr[-1]))
+        np.save(os.path.join(path, f"{name}.tfs.npy"), tfs)
+
+    with open(os.path.join(path, f"{name}.vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(terms, f, ensure_ascii=False)
+
+
+def write_segment(directory: str, generation: int, index) -> None:
+    """Seal the full contents of an InvertedIndex as a new segment generation"""
+    segments_dir = _segments_dir(directory)
+    path = os.path.join(segments_dir, f"{generation:06d}")
+    os.makedirs(path, exist_ok=True)
+
+    _write_postings(path, "keywords", index.postings, with_tfs=True)
+    _write_postings(path, "words", index.word_postings, with_tfs=False)
+    np.save(os.path.join(path, "doc_lengths.npy"), np.asarray(index.doc_lengths, dtype=np.int32))
+
+    # Readers only ever see a complete generation
+    manifest = {"generation": generation, "num_docs": len(index), "total_length": index.total_length}
+    tmp_path = os.path.join(segments_dir, "CURRENT.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(segments_dir, "CURRENT"))
+
+    # Older generations may still be mapped by other workers; unlinking keeps their pages valid
+    for name in os.listdir(segments_dir):
+        if name.isdigit() and int(name) < generation:
+            shutil.rmtree(os.path.join(segments_dir, name), ignore_errors=True)
+
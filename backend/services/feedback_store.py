@@ -0,0 +1,316 @@
+"""
+Append-only storage for chatbot feedback.
+
+Requests only enqueue entries; a background task writes them in batches to
+``data/feedback/chatbot_feedback.jsonl`` (one JSON object per line) so the
+event loop never waits on disk. Every worker appends to the same file under
+an advisory lock. The fsync policy is chosen with CHATBOT_FEEDBACK_FSYNC:
+
+* ``batch``     fsync after every written batch (default)
+* ``interval``  fsync at most every ``fsync_interval`` seconds, also when
+                the writer goes idle with unsynced entries
+* ``never``     leave it to the OS
+
+Queries read the file incrementally: each worker remembers the byte offset
+it has read up to and only parses lines appended since, keeping running
+per-group totals and the last ``RECENT_ENTRIES`` entries in memory. Filtered
+summaries, and listings reaching further back, stream the file in a thread.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("batch", "interval", "never")
+MAX_BATCH = 256
+MAX_PENDING = 10_000
+# Newest entries kept in memory per worker to answer listings without a scan
+RECENT_ENTRIES = 1000
+GROUP_KEYS = ("intent", "session_id", "rating")
+
+
+def _new_group() -> Dict:
+    return {"count": 0, "rated": 0, "rating_sum": 0, "helpful": 0, "voted": 0}
+
+
+def _add_to_group(group: Dict, entry: Dict):
+    group["count"] += 1
+    if isinstance(entry.get("rating"), (int, float)):
+        group["rated"] += 1
+        group["rating_sum"] += entry["rating"]
+    if entry.get("helpful") is not None:
+        group["voted"] += 1
+        group["helpful"] += bool(entry["helpful"])
+
+
+class FeedbackStore:
+    """Batched, non-blocking JSONL writer with a small query API"""
+
+    def __init__(self, path: str, flush_interval: float = 1.0, fsync: Optional[str] = None,
+                 fsync_interval: float = 5.0, max_batch: int = MAX_BATCH):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync = (fsync or os.getenv("CHATBOT_FEEDBACK_FSYNC", "batch")).lower()
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{self.fsync}'. Available: {', '.join(FSYNC_POLICIES)}")
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._migrate_legacy_file()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self.written = 0
+        self.dropped = 0
+
+        # Newest entries read so far, how many were read, the byte offset reached and running totals
+        self._recent: deque = deque(maxlen=RECENT_ENTRIES)
+        self._read_count = 0
+        self._offset = 0
+        self._totals: Dict[str, Dict[str, Dict]] = {key: defaultdict(_new_group) for key in GROUP_KEYS}
+        self._read_lock = asyncio.Lock()
+
+    def _migrate_legacy_file(self):
+        """Move entries from the old rewrite-on-every-request JSON file into the log"""
+        legacy_path = os.path.splitext(self.path)[0] + ".json"
+        if os.path.exists(self.path) or not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, encoding="utf-8") as f:
+                entries = json.load(f)
+            self._write_batch(entries, force_fsync=True)
+            os.replace(legacy_path, legacy_path + ".migrated")
+            logger.info(f"📝 Migrated {len(entries)} feedback entries to {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Could not migrate legacy feedback file: {e}")
+
+    def start(self):
+        """Start the background writer on the running event loop (idempotent)"""
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=MAX_PENDING)
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, entry: Dict) -> bool:
+        """Queue an entry for writing; never blocks"""
+        self.start()
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("⚠️ Feedback queue full, dropping entry")
+            return False
+
+    async def _run(self):
+        while True:
+            batch = [await self._next_entry()]
+            # Gather whatever else arrives within the flush interval
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"❌ Failed to write {len(batch)} feedback entries: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _next_entry(self) -> Dict:
+        """Wait for the next entry, fsyncing unsynced writes when the wait runs past the interval"""
+        while self.fsync == "interval" and self._unsynced:
+            timeout = self._last_fsync + self.fsync_interval - time.monotonic()
+            try:
+                return await asyncio.wait_for(self._queue.get(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.to_thread(self._fsync_file)
+                    self._last_fsync = time.monotonic()
+                    self._unsynced = False
+                except OSError as e:
+                    logger.error(f"❌ Failed to fsync feedback log: {e}")
+                    self._last_fsync = time.monotonic()
+        return await self._queue.get()
+
+    def _write_batch(self, entries: List[Dict], force_fsync: bool = False):
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+        with open(self.path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.write(data)
+                f.flush()
+                now = time.monotonic()
+                if force_fsync or self.fsync == "batch" or (
+                        self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+                    os.fsync(f.fileno())
+                    self._last_fsync = now
+                    self._unsynced = False
+                else:
+                    self._unsynced = self.fsync == "interval"
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        self.written += len(entries)
+
+    async def flush(self):
+        """Wait until every queued entry is on disk"""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    async def close(self):
+        """Flush pending entries and stop the writer (called on shutdown)"""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.fsync != "batch" and os.path.exists(self.path):
+            await asyncio.to_thread(self._fsync_file)
+
+    def _fsync_file(self):
+        with open(self.path, "ab") as f:
+            os.fsync(f.fileno())
+
+    def _read_tail(self, offset: int) -> Tuple[List[Dict], int, bool]:
+        """Entries appended after ``offset``, the new offset, and whether the file was replaced"""
+        if not os.path.exists(self.path):
+            return [], 0, offset > 0
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            reset = f.tell() < offset
+            if reset:
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+
+        # A line without its newline is still being written; read it next time
+        complete = data.rfind(b"\n") + 1
+        return list(self._parse_lines(data[:complete].splitlines())), offset + complete, reset
+
+    @staticmethod
+    def _parse_lines(lines) -> Iterator[Dict]:
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A torn line from a crashed writer
+                continue
+
+    def _scan(self, end: int) -> Iterator[Dict]:
+        """Stream the entries in the first ``end`` bytes of the file, oldest first"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            def lines():
+                while f.tell() < end:
+                    line = f.readline(end - f.tell())
+                    if not line.endswith(b"\n"):
+                        return
+                    yield line
+            yield from self._parse_lines(lines())
+
+    async def _catch_up(self):
+        """Parse whatever has been appended to the file since the last query"""
+        await self.flush()
+        async with self._read_lock:
+            entries, self._offset, reset = await asyncio.to_thread(self._read_tail, self._offset)
+            if reset:
+                self._recent.clear()
+                self._read_count = 0
+                self._totals = {key: defaultdict(_new_group) for key in GROUP_KEYS}
+            self._recent.extend(entries)
+            self._read_count += len(entries)
+            for entry in entries:
+                for key in GROUP_KEYS:
+                    _add_to_group(self._totals[key][str(entry.get(key))], entry)
+            return self._offset
+
+    @staticmethod
+    def _matches(entry: Dict, session_id: Optional[str], intent: Optional[str], rating: Optional[int]) -> bool:
+        return ((session_id is None or entry.get("session_id") == session_id)
+                and (intent is None or entry.get("intent") == intent)
+                and (rating is None or entry.get("rating") == rating))
+
+    async def query(self, session_id: Optional[str] = None, intent: Optional[str] = None,
+                    rating: Optional[int] = None, limit: int = 100) -> List[Dict]:
+        """Most recent feedback entries matching the filters"""
+        end = await self._catch_up()
+        matches = []
+        for entry in reversed(self._recent):
+            if len(matches) >= limit:
+                return matches
+            if self._matches(entry, session_id, intent, rating):
+                matches.append(entry)
+        if self._read_count <= len(self._recent):
+            return matches
+
+        # Older entries than the in-memory window are needed
+        def scan() -> List[Dict]:
+            newest = deque(
+                (entry for entry in self._scan(end) if self._matches(entry, session_id, intent, rating)),
+                maxlen=limit
+            )
+            return list(reversed(newest))
+
+        return await asyncio.to_thread(scan)
+
+    async def aggregate(self, group_by: str = "intent", session_id: Optional[str] = None,
+                        intent: Optional[str] = None, rating: Optional[int] = None) -> Dict[str, Dict]:
+        """Count, average rating and helpful share per ``group_by`` value"""
+        if group_by not in GROUP_KEYS:
+            raise ValueError(f"Cannot group feedback by '{group_by}'")
+
+        end = await self._catch_up()
+        if session_id is None and intent is None and rating is None:
+            groups = self._totals[group_by]
+        else:
+            def scan() -> Dict[str, Dict]:
+                filtered = defaultdict(_new_group)
+                for entry in self._scan(end):
+                    if self._matches(entry, session_id, intent, rating):
+                        _add_to_group(filtered[str(entry.get(group_by))], entry)
+                return filtered
+
+            groups = await asyncio.to_thread(scan)
+
+        return {
+            key: {
+                "count": group["count"],
+                "average_rating": round(group["rating_sum"] / group["rated"], 2) if group["rated"] else None,
+                "helpful_rate": round(group["helpful"] / group["voted"], 4) if group["voted"] else None
+            }
+            for key, group in groups.items()
+        }
+
+    def get_status(self) -> Dict:
+        return {
+            "path": self.path,
+            "fsync": self.fsync,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped
+        }
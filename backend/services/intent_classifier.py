@@ -0,0 +1,105 @@
+"""
+Token-level intent matcher for the chatbot.
+
+Patterns (single words or phrases like "sign up") are compiled into one hash
+table keyed by token tuples, so a query is scored in a single pass over its
+tokens: for each position only the n-grams up to the longest pattern length
+are looked up. Cost depends on query length, not on how many patterns exist,
+and matching respects word boundaries ("facebook" does not match "book").
+"""
+import re
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def token_forms(token: str) -> Tuple[str, ...]:
+    """The token plus simple inflection-stripped forms ("reviews" -> "review")"""
+    forms = [token]
+    if len(token) > 4:
+        if token.endswith("ing"):
+            forms += [token[:-3], token[:-3] + "e"]
+        elif token.endswith("ed"):
+            forms += [token[:-2], token[:-1]]
+        elif token.endswith("es"):
+            forms += [token[:-2], token[:-1]]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        forms.append(token[:-1])
+    return tuple(dict.fromkeys(forms))
+
+
+class IntentClassifier:
+    """Scores every intent in one pass over the query tokens"""
+
+    def __init__(self, patterns: Optional[Dict[str, Iterable[str]]] = None):
+        # token tuple -> intents listing that pattern
+        self._table: Dict[Tuple[str, ...], List[str]] = {}
+        # Intents in registration order, used to break score ties
+        self._intents: Dict[str, int] = {}
+        # First words of multi-word patterns
+        self._phrase_starts = set()
+        self.max_pattern_length = 0
+        for intent, intent_patterns in (patterns or {}).items():
+            self.add_patterns(intent, intent_patterns)
+
+    def __len__(self) -> int:
+        return len(self._intents)
+
+    @property
+    def pattern_count(self) -> int:
+        return sum(len(intents) for intents in self._table.values())
+
+    def add_pattern(self, intent: str, pattern: str):
+        """Register a word or phrase for an intent; takes effect immediately"""
+        key = tuple(tokenize(pattern))
+        if not key:
+            raise ValueError(f"Pattern '{pattern}' has no word characters")
+
+        self._intents.setdefault(intent, len(self._intents))
+        intents = self._table.setdefault(key, [])
+        if intent not in intents:
+            intents.append(intent)
+        if len(key) > 1:
+            self._phrase_starts.add(key[0])
+        self.max_pattern_length = max(self.max_pattern_length, len(key))
+
+    def add_patterns(self, intent: str, patterns: Iterable[str]):
+        for pattern in patterns:
+            self.add_pattern(intent, pattern)
+
+    def scores(self, query: str) -> Dict[str, int]:
+        """Number of distinct patterns of each intent found in the query"""
+        forms = [token_forms(token) for token in tokenize(query)]
+        table = self._table
+        matched = set()
+
+        for start, token_variants in enumerate(forms):
+            for form in token_variants:
+                if (form,) in table:
+                    matched.add((form,))
+
+            # Phrases are rare, so only tokens that can start one pay for n-gram lookups
+            if self._phrase_starts.isdisjoint(token_variants):
+                continue
+            for length in range(2, min(self.max_pattern_length, len(forms) - start) + 1):
+                for key in product(*forms[start:start + length]):
+                    if key in table:
+                        matched.add(key)
+
+        scores: Dict[str, int] = {}
+        for key in matched:
+            for intent in table[key]:
+                scores[intent] = scores.get(intent, 0) + 1
+        return scores
+
+    def classify(self, query: str, default: str = "general") -> str:
+        """Best scoring intent; ties go to the intent registered first"""
+        scores = self.scores(query)
+        if not scores:
+            return default
+        return max(scores, key=lambda intent: (scores[intent], -self._intents[intent]))
@@ -0,0 +1,51 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor encodes the sort key of the last row a client has seen (for example
+``(timestamp, id)``) so the next page is fetched with an index range scan
+instead of an OFFSET that re-reads every skipped row. Totals, where a client
+wants them, come from the planner's estimate rather than a full COUNT.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(*values: Any) -> str:
+    """URL-safe cursor for a sort key; datetimes are stored as ISO strings"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """Decode a cursor into values of the given types; 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return [
+            datetime.fromisoformat(v) if t is datetime and v is not None else (t(v) if v is not None else None)
+            for v, t in zip(values, types)
+        ]
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def estimate_count(db: AsyncSession, stmt: Select) -> int:
+    """Row count of ``stmt`` from the Postgres planner (no scan); an exact COUNT elsewhere"""
+    if db.bind.dialect.name == "postgresql":
+        compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+        connection = await db.connection()
+        plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    result = await db.execute(select(func.count()).select_from(stmt.subquery()))
+    return result.scalar()
@@ -1,35 +1,44 @@
 import asyncio
-import json
 import logging
-import os
 import pickle
 import re
 import time
-from collections import Counter, defaultdict
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Optional, AsyncGenerator
-from math import sqrt
+from typing import Dict, List, Optional, AsyncGenerator, Iterator
 
 from services.vector_store_service import VectorStoreService, Document
+from services.chat_session_store import SessionStore, create_session_store
+from services.answer_cache import AnswerCache, normalize_query
+from services.intent_classifier import IntentClassifier
+from services.feedback_store import FeedbackStore
 
 logger = logging.getLogger(__name__)
 
+# Minimum characters per streamed answer frame
+STREAM_CHUNK_CHARS = 64
+
 class RagChatbotService:
-    """Model-free RAG chatbot service using rule-based NLP and TF-IDF"""
+    """Model-free RAG chatbot service using rule-based NLP and BM25/TF-IDF retrieval"""
     
-    def __init__(self):
+    def __init__(self, session_store: Optional[SessionStore] = None):
         logger.info("🚀 Initializing Model-Free RAG Chatbot Service...")
         
         # Initialize components
         self.vector_store = VectorStoreService()
-        self.sessions = {}  # Store conversation history
-        self.feedback_data = []
+        self.sessions = session_store or create_session_store()  # Store conversation history
+        # Feedback is written in batches by a background task
+        self.feedback = FeedbackStore("./data/feedback/chatbot_feedback.jsonl")
+        
+        # Answers for repeated questions, invalidated when the knowledge base changes
+        self.answer_cache = AnswerCache()
         
         # Response templates
         self.response_templates = self._initialize_response_templates()
         
-        # Intent patterns
+        # Intent patterns, compiled into a single token matcher
         self.intent_patterns = self._initialize_intent_patterns()
+        self.intent_classifier = IntentClassifier(self.intent_patterns)
         
         # Common words to filter out (stop words)
         self.stop_words = {
@@ -120,43 +129,16 @@ class RagChatbotService:
         
         return keywords
     
-    def _calculate_tf_idf_similarity(self, query_keywords: List[str], doc_keywords: List[str]) -> float:
-        """Calculate TF-IDF-like similarity between query and document keywords"""
-        if not query_keywords or not doc_keywords:
-            return 0.0
-        
-        # Create word frequency counts
-        query_freq = Counter(query_keywords)
-        doc_freq = Counter(doc_keywords)
-        
-        # Get all unique words
-        all_words = set(query_keywords + doc_keywords)
-        
-        # Calculate similarity using cosine similarity of frequency vectors
-        dot_product = sum(query_freq[word] * doc_freq[word] for word in all_words)
-        
-        query_magnitude = sqrt(sum(freq ** 2 for freq in query_freq.values()))
-        doc_magnitude = sqrt(sum(freq ** 2 for freq in doc_freq.values()))
-        
-        if query_magnitude == 0 or doc_magnitude == 0:
-            return 0.0
-        
-        return dot_product / (query_magnitude * doc_magnitude)
-    
     def _detect_intent(self, query: str) -> str:
         """Detect the intent of the user query"""
-        query_lower = query.lower()
-        intent_scores = {}
-        
-        for intent, patterns in self.intent_patterns.items():
-            score = sum(1 for pattern in patterns if pattern in query_lower)
-            if score > 0:
-                intent_scores[intent] = score
-        
-        if intent_scores:
-            return max(intent_scores, key=intent_scores.get)
-        
-        return 'general'
+        return self.intent_classifier.classify(query, default='general')
+    
+    def add_intent_pattern(self, intent: str, pattern: str):
+        """Teach the intent classifier a new word or phrase at runtime"""
+        self.intent_classifier.add_pattern(intent, pattern)
+        self.intent_patterns.setdefault(intent, []).append(pattern)
+        # Cached answers are keyed by intent
+        self.answer_cache.clear()
     
     def _generate_response_from_context(self, query: str, relevant_docs: List[Document], intent: str) -> str:
         """Generate response using templates and context"""
@@ -219,38 +201,73 @@ class RagChatbotService:
         
         return response
     
+    async def _retrieve(self, query: str) -> Dict:
+        """Retrieval stage shared by the regular and streaming responses"""
+        # Extract keywords from query
+        query_keywords = self._extract_keywords(query)
+        
+        # Get relevant context from vector store using keyword-based similarity
+        relevant_docs = await self.vector_store.similarity_search(query, k=2)
+        
+        # Detect intent
+        intent = self._detect_intent(query)
+        
+        # Calculate confidence based on keyword matches and context relevance
+        confidence = self._calculate_confidence(query_keywords, relevant_docs, intent)
+        
+        # Extract sources
+        sources = [doc.metadata.get("source", "Bookify Knowledge Base") for doc in relevant_docs] if relevant_docs else ["Bookify Knowledge Base"]
+        
+        return {
+            "docs": relevant_docs,
+            "intent": intent,
+            "confidence": confidence,
+            "sources": sources
+        }
+    
+    async def _answer(self, query: str) -> Dict:
+        """Answer a query, serving repeated questions from the answer cache"""
+        query_keywords = self._extract_keywords(query)
+        intent = self._detect_intent(query)
+        # Keyword-free queries take the raw-text fallback path, so they are not cached
+        cache_key = f"{intent}:{normalize_query(query_keywords)}" if query_keywords else None
+        
+        # Corpus size changes whenever documents are added by any worker
+        corpus_version = self.vector_store.refresh()
+        if cache_key:
+            cached = self.answer_cache.get(cache_key, corpus_version)
+            if cached:
+                return cached
+        
+        retrieval = await self._retrieve(query)
+        
+        result = {
+            # Generate response
+            "answer": self._generate_response_from_context(query, retrieval["docs"], retrieval["intent"]),
+            "sources": retrieval["sources"],
+            "confidence": retrieval["confidence"],
+            # Generate suggestions
+            "suggestions": self._generate_suggestions(retrieval["intent"]),
+            "intent": retrieval["intent"]
+        }
+        
+        if cache_key:
+            self.answer_cache.put(cache_key, corpus_version, result)
+        return result
+    
     async def get_response(self, query: str, session_id: str, user_context: Dict = None) -> Dict:
         """Get response using model-free RAG approach"""
         try:
-            # Extract keywords from query
-            query_keywords = self._extract_keywords(query)
-            
-            # Get relevant context from vector store using keyword-based similarity
-            relevant_docs = await self.vector_store.similarity_search(query, k=2)
-            
-            # Detect intent
-            intent = self._detect_intent(query)
-            
-            # Generate response
-            response_text = self._generate_response_from_context(query, relevant_docs, intent)
-            
-            # Calculate confidence based on keyword matches and context relevance
-            confidence = self._calculate_confidence(query_keywords, relevant_docs, intent)
-            
-            # Extract sources
-            sources = [doc.metadata.get("source", "Bookify Knowledge Base") for doc in relevant_docs] if relevant_docs else ["Bookify Knowledge Base"]
-            
-            # Generate suggestions
-            suggestions = self._generate_suggestions(intent, user_context)
+            result = await self._answer(query)
             
             # Store in session history
-            self._update_session_history(session_id, query, response_text)
+            await self._update_session_history(session_id, query, result["answer"], result["intent"])
             
             return {
-                "answer": response_text,
-                "sources": sources,
-                "confidence": confidence,
-                "suggestions": suggestions
+                "answer": result["answer"],
+                "sources": result["sources"],
+                "confidence": result["confidence"],
+                "suggestions": result["suggestions"]
             }
             
         except Exception as e:
@@ -273,7 +290,7 @@ class RagChatbotService:
             # Additional boost based on keyword similarity
             best_doc = relevant_docs[0]
             doc_keywords = self._extract_keywords(best_doc.page_content)
-            similarity = self._calculate_tf_idf_similarity(query_keywords, doc_keywords)
+            similarity = self.vector_store.calculate_similarity(query_keywords, doc_keywords)
             base_confidence += similarity * 0.3
         
         # Boost confidence for well-recognized intents
@@ -323,51 +340,69 @@ class RagChatbotService:
             "What features does Bookify offer?"
         ])
     
-    def _update_session_history(self, session_id: str, user_message: str, bot_response: str):
+    async def _update_session_history(self, session_id: str, user_message: str, bot_response: str,
+                                intent: Optional[str] = None):
         """Update conversation history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        
-        self.sessions[session_id].append({
+        # The store keeps only the last exchanges and evicts idle sessions
+        await self.sessions.append(session_id, {
             "user": user_message,
             "assistant": bot_response,
+            "intent": intent,
             "timestamp": datetime.now().isoformat()
         })
-        
-        # Keep only last 10 exchanges
-        if len(self.sessions[session_id]) > 10:
-            self.sessions[session_id] = self.sessions[session_id][-10:]
+    
+    @staticmethod
+    def _iter_response_chunks(response_text: str) -> Iterator[str]:
+        """Yield the answer in sentence-sized pieces that concatenate to the full text"""
+        for match in re.finditer(r'[^.!?]+[.!?]*\s*|[.!?]+\s*', response_text):
+            yield match.group(0)
+    
+    @staticmethod
+    def _coalesce_chunks(chunks: Iterator[str], min_chars: int = STREAM_CHUNK_CHARS) -> Iterator[str]:
+        """Merge small chunks so each SSE frame carries at least ``min_chars`` characters"""
+        buffer = []
+        size = 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= min_chars:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
     
     async def get_streaming_response(self, query: str, session_id: str) -> AsyncGenerator[Dict, None]:
-        """Get streaming response for real-time chat"""
+        """Stream retrieval results first, then the answer as it is produced"""
         try:
             yield {"type": "start", "content": ""}
             
-            # Get response
-            response = await self.get_response(query, session_id)
+            # Sources go out as soon as retrieval finishes (or the answer is cached)
+            result = await self._answer(query)
+            yield {
+                "type": "sources",
+                "sources": result["sources"],
+                "confidence": result["confidence"],
+                "suggestions": result["suggestions"]
+            }
             
-            # Simulate streaming by sending word by word
-            words = response["answer"].split()
-            current_response = ""
+            parts = []
+            for chunk in self._coalesce_chunks(self._iter_response_chunks(result["answer"])):
+                parts.append(chunk)
+                yield {"type": "token", "content": chunk}
             
-            for word in words:
-                current_response += word + " "
-                yield {
-                    "type": "token",
-                    "content": word,
-                    "partial_response": current_response.strip()
-                }
-                await asyncio.sleep(0.03)  # Small delay for streaming effect
+            answer = "".join(parts)
+            await self._update_session_history(session_id, query, answer, result["intent"])
             
             yield {
                 "type": "complete",
-                "content": response["answer"],
-                "sources": response["sources"],
-                "confidence": response["confidence"],
-                "suggestions": response["suggestions"]
+                "content": answer,
+                "sources": result["sources"],
+                "confidence": result["confidence"],
+                "suggestions": result["suggestions"]
             }
             
         except Exception as e:
+            logger.error(f"❌ Error streaming response: {e}")
             yield {
                 "type": "error",
                 "content": f"I'm having trouble right now. Please try asking about Bookify features.",
@@ -375,22 +410,34 @@ class RagChatbotService:
             }
     
     async def save_feedback(self, feedback_data: dict):
-        """Save user feedback"""
+        """Queue user feedback for the background writer"""
+        intent = feedback_data.get("intent")
+        if intent is None and feedback_data.get("session_id"):
+            # Attribute feedback to the intent of the latest answer in the session
+            history = await self.sessions.get(feedback_data["session_id"])
+            if history:
+                intent = history[-1].get("intent")
+        
         feedback_entry = {
             "timestamp": datetime.now().isoformat(),
             "session_id": feedback_data.get("session_id"),
             "message_id": feedback_data.get("message_id"),
+            "intent": intent,
             "rating": feedback_data.get("rating"),
             "comment": feedback_data.get("comment", ""),
             "helpful": feedback_data.get("helpful")
         }
         
-        self.feedback_data.append(feedback_entry)
-        
-        # Save to file
-        os.makedirs("./data/feedback", exist_ok=True)
-        with open("./data/feedback/chatbot_feedback.json", "w") as f:
-            json.dump(self.feedback_data, f, indent=2)
+        self.feedback.submit(feedback_entry)
+    
+    async def get_feedback(self, session_id: Optional[str] = None, intent: Optional[str] = None,
+                           rating: Optional[int] = None, limit: int = 100) -> List[Dict]:
+        """Stored feedback, newest first"""
+        return await self.feedback.query(session_id=session_id, intent=intent, rating=rating, limit=limit)
+    
+    async def get_feedback_summary(self, group_by: str = "intent", **filters) -> Dict[str, Dict]:
+        """Feedback counts and ratings grouped by intent, session or rating"""
+        return await self.feedback.aggregate(group_by=group_by, **filters)
     
     def add_knowledge(self, content: str, source: str, category: str = "general"):
         """Add new knowledge to the vector store"""
@@ -404,24 +451,85 @@ class RagChatbotService:
         )
         
         self.vector_store.add_documents([doc])
+        self.answer_cache.clear()
     
-    def get_session_history(self, session_id: str) -> List[Dict]:
+    async def get_session_history(self, session_id: str) -> List[Dict]:
         """Get conversation history for a session"""
-        return self.sessions.get(session_id, [])
+        return await self.sessions.get(session_id)
     
-    def clear_session(self, session_id: str):
+    async def clear_session(self, session_id: str):
         """Clear conversation history for a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        await self.sessions.delete(session_id)
     
     def get_status(self) -> Dict:
         """Get service status"""
         return {
             "service_type": "Model-Free RAG",
-            "algorithm": "TF-IDF + Rule-Based",
+            "algorithm": f"{self.vector_store.scorer.name.upper()} + Rule-Based",
             "vector_store_status": self.vector_store.get_status(),
             "active_sessions": len(self.sessions),
-            "total_feedback": len(self.feedback_data),
+            "session_store": self.sessions.get_status(),
+            "answer_cache": self.answer_cache.get_status(),
+            "feedback": self.feedback.get_status(),
             "response_templates": len(self.response_templates),
             "intent_patterns": len(self.intent_patterns)
-        }
\ No newline at end of file
+        }
+
+
+class ChatbotServiceProvider:
+    """Process-wide RagChatbotService that is built lazily, off the event loop"""
+    
+    def __init__(self):
+        self.service: Optional[RagChatbotService] = None
+        self.state = "not_started"  # -> warming_up -> ready | failed
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start_warmup(self) -> asyncio.Task:
+        """Start building the service in a worker thread (idempotent, retries after failure)"""
+        if self._task is None or self.state == "failed":
+            self.state = "warming_up"
+            self.error = None
+            self._task = asyncio.create_task(self._warm_up())
+        return self._task
+    
+    async def _warm_up(self):
+        started = time.perf_counter()
+        try:
+            # Index loading is blocking file and CPU work
+            self.service = await asyncio.to_thread(RagChatbotService)
+            self.state = "ready"
+            logger.info(f"✅ Chatbot warmed up in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.error(f"❌ Chatbot warm-up failed: {e}")
+            self.error = str(e)
+            self.state = "failed"
+    
+    async def get(self, timeout: float = 10.0) -> Optional[RagChatbotService]:
+        """Return the service, waiting up to ``timeout`` seconds for warm-up to finish"""
+        if self.service:
+            return self.service
+        
+        task = self.start_warmup()
+        try:
+            # Shield so a timed-out request does not cancel the shared warm-up
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.service
+    
+    async def shutdown(self):
+        """Flush state that is written in the background"""
+        if self.service:
+            await self.service.feedback.close()
+    
+    def get_status(self) -> Dict:
+        """Readiness of the shared service"""
+        return {
+            "state": self.state,
+            "ready": self.service is not None,
+            "error": self.error
+        }
+
+
+chatbot_provider = ChatbotServiceProvider()
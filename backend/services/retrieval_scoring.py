@@ -0,0 +1,153 @@
+"""
+Ranking functions for the model-free vector store.
+
+Every scorer works on the statistics kept by ``InvertedIndex`` (postings,
+document frequencies, document lengths) and scores a query as a sum of
+``query weight * document term weight`` over the query terms, so only the
+postings of those terms are ever touched.
+"""
+import heapq
+from collections import Counter, defaultdict
+from math import log, sqrt
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Scorer:
+    """Base class for pluggable ranking functions"""
+
+    name = "base"
+
+    # Documents scoring at or below this value are not returned
+    min_score = 0.0
+
+    def idf(self, index, term: str) -> float:
+        raise NotImplementedError
+
+    def query_weights(self, index, query_keywords: List[str]) -> Dict[str, float]:
+        """Weight of every distinct query term"""
+        raise NotImplementedError
+
+    def term_weight(self, index, term: str, doc_id: int, tf: int) -> float:
+        """Weight of a term inside a document"""
+        raise NotImplementedError
+
+    def score(self, index, query_keywords: List[str]) -> Dict[int, float]:
+        """Score every document that shares at least one term with the query"""
+        scores = defaultdict(float)
+        for term, query_weight in self.query_weights(index, query_keywords).items():
+            for doc_id, tf in index.postings.get(term, {}).items():
+                scores[doc_id] += query_weight * self.term_weight(index, term, doc_id, tf)
+        return scores
+
+    def top_k(self, index, query_keywords: List[str], k: int) -> List[Tuple[int, float]]:
+        """Return the k best (doc_id, score) pairs above ``min_score``"""
+        scores = self.score(index, query_keywords)
+        candidates = ((doc_id, s) for doc_id, s in scores.items() if s > self.min_score)
+        return select_top_k(candidates, k)
+
+
+class BM25Scorer(Scorer):
+    """Okapi BM25 with configurable term saturation (k1) and length normalization (b)"""
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, min_score: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.min_score = min_score
+
+    def idf(self, index, term: str) -> float:
+        # Lucene variant, always positive
+        n = len(index)
+        df = index.doc_freq(term)
+        return log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def query_weights(self, index, query_keywords: List[str]) -> Dict[str, float]:
+        return {
+            term: count * self.idf(index, term)
+            for term, count in Counter(query_keywords).items()
+        }
+
+    def term_weight(self, index, term: str, doc_id: int, tf: int) -> float:
+        avg_length = index.avg_doc_length or 1.0
+        length_norm = 1 - self.b + self.b * index.doc_lengths[doc_id] / avg_length
+        return tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+
+class TfIdfScorer(Scorer):
+    """Cosine similarity of TF-IDF vectors"""
+
+    name = "tfidf"
+
+    def __init__(self, min_score: float = 0.1):
+        self.min_score = min_score
+        self._norms: List[float] = []
+        self._norms_version: Optional[int] = None
+
+    def idf(self, index, term: str) -> float:
+        # Smoothed idf, as if one extra document contained every term
+        return log((1 + len(index)) / (1 + index.doc_freq(term))) + 1
+
+    def _doc_norms(self, index) -> List[float]:
+        """Document vector norms, recomputed only when the corpus changed"""
+        if self._norms_version != index.version:
+            squares = [0.0] * len(index)
+            for term, postings in index.postings.items():
+                idf = self.idf(index, term)
+                for doc_id, tf in postings.items():
+                    squares[doc_id] += (tf * idf) ** 2
+            self._norms = [sqrt(value) for value in squares]
+            self._norms_version = index.version
+        return self._norms
+
+    def query_weights(self, index, query_keywords: List[str]) -> Dict[str, float]:
+        weights = {
+            term: count * self.idf(index, term)
+            for term, count in Counter(query_keywords).items()
+        }
+        magnitude = sqrt(sum(w * w for w in weights.values()))
+        if magnitude == 0:
+            return {}
+        return {term: w / magnitude for term, w in weights.items()}
+
+    def term_weight(self, index, term: str, doc_id: int, tf: int) -> float:
+        norm = self._doc_norms(index)[doc_id]
+        if norm == 0:
+            return 0.0
+        return tf * self.idf(index, term) / norm
+
+    def similarity(self, index, query_keywords: List[str], doc_keywords: List[str]) -> float:
+        """Cosine similarity of two keyword lists under the corpus idf"""
+        if not query_keywords or not doc_keywords:
+            return 0.0
+
+        query_weights = self.query_weights(index, query_keywords)
+        doc_weights = {
+            term: count * self.idf(index, term)
+            for term, count in Counter(doc_keywords).items()
+        }
+        doc_magnitude = sqrt(sum(w * w for w in doc_weights.values()))
+        if not query_weights or doc_magnitude == 0:
+            return 0.0
+
+        dot_product = sum(w * doc_weights.get(term, 0.0) for term, w in query_weights.items())
+        return dot_product / doc_magnitude
+
+
+def select_top_k(scored: Iterable[Tuple[int, float]], k: int) -> List[Tuple[int, float]]:
+    """Bounded-heap top-k; ties go to the document added first"""
+    return heapq.nlargest(k, scored, key=lambda item: (item[1], -item[0]))
+
+
+SCORERS = {
+    BM25Scorer.name: BM25Scorer,
+    TfIdfScorer.name: TfIdfScorer,
+}
+
+
+def get_scorer(name: str, **params) -> Scorer:
+    """Build a scorer by name ("bm25" or "tfidf")"""
+    try:
+        return SCORERS[name.lower()](**params)
+    except KeyError:
+        raise ValueError(f"Unknown scorer '{name}'. Available: {', '.join(SCORERS)}")
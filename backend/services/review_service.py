@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 from models import Book, User, Review
 from schemas import ReviewCreate
 from repositories import review_repository
+from services.admin_metrics_service import admin_metrics
 
 async def create_review_service(book_id: int, review_data: ReviewCreate, db: AsyncSession) -> Review:
     book = await db.get(Book, book_id)
@@ -28,13 +29,15 @@ async def create_review_service(book_id: int, review_data: ReviewCreate, db: Asy
             detail="You have already reviewed this book!"
         )
 
-    return await review_repository.create_review(
+    review = await review_repository.create_review(
         book_id=book_id,
         user_id=review_data.user_id,
         rating=review_data.rating,
         comment=review_data.comment,
         db=db
     )
+    admin_metrics.mark_stale()
+    return review
 
 async def get_reviews_by_book_service(book_id: int, db: AsyncSession) -> List[Review]:
     book = await db.get(Book, book_id)
@@ -0,0 +1,147 @@
+"""
+Vectorized retrieval over the knowledge base.
+
+The corpus is kept as a CSR term-document matrix built from plain NumPy
+arrays (no SciPy): row ``t`` holds the documents containing term ``t`` and
+the scorer's weight of the term in each of them. A batch of queries is a
+sparse query-term matrix, so scoring the whole corpus is a single sparse
+product followed by a partial sort (``np.partition``) for top-k.
+"""
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.retrieval_scoring import BM25Scorer, Scorer, TfIdfScorer
+
+# Upper bound on the dense (queries x documents) score block held at once
+MAX_SCORE_BLOCK = 1 << 22
+
+
+def _bm25_weights(scorer: BM25Scorer, index, rows, doc_ids, tfs, idfs):
+    doc_lengths = np.asarray(index.doc_lengths, dtype=np.float64)[doc_ids]
+    avg_length = index.avg_doc_length or 1.0
+    length_norm = 1 - scorer.b + scorer.b * doc_lengths / avg_length
+    return tfs * (scorer.k1 + 1) / (tfs + scorer.k1 * length_norm)
+
+
+def _tfidf_weights(scorer: TfIdfScorer, index, rows, doc_ids, tfs, idfs):
+    weights = tfs * idfs[rows]
+    norms = np.sqrt(np.bincount(doc_ids, weights=weights ** 2, minlength=len(index)))
+    safe_norms = np.where(norms[doc_ids] > 0, norms[doc_ids], 1.0)
+    return weights / safe_norms
+
+
+# Vectorized document-term weights per scorer; other scorers use term_weight()
+MATRIX_WEIGHTS = {
+    BM25Scorer: _bm25_weights,
+    TfIdfScorer: _tfidf_weights,
+}
+
+
+class SparseTermMatrix:
+    """CSR term-document matrix with scorer weights precomputed"""
+
+    def __init__(self, vocabulary: Dict[str, int], indptr: np.ndarray, indices: np.ndarray,
+                 data: np.ndarray, num_docs: int, version: int):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.num_docs = num_docs
+        # Index version the matrix was built from
+        self.version = version
+
+    @classmethod
+    def from_index(cls, index, scorer: Scorer) -> "SparseTermMatrix":
+        """Build the matrix from an InvertedIndex in one pass over its postings"""
+        terms = list(index.postings)
+        vocabulary = {term: row for row, term in enumerate(terms)}
+
+        row_lengths = np.fromiter((len(index.postings[t]) for t in terms), dtype=np.int64, count=len(terms))
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(row_lengths, out=indptr[1:])
+        nnz = int(indptr[-1])
+
+        indices = np.fromiter(
+            chain.from_iterable(index.postings[t].keys() for t in terms), dtype=np.int64, count=nnz
+        )
+        tfs = np.fromiter(
+            chain.from_iterable(index.postings[t].values() for t in terms), dtype=np.float64, count=nnz
+        )
+        rows = np.repeat(np.arange(len(terms), dtype=np.int64), row_lengths)
+        idfs = np.fromiter((scorer.idf(index, t) for t in terms), dtype=np.float64, count=len(terms))
+
+        weight_fn = MATRIX_WEIGHTS.get(type(scorer))
+        if weight_fn is not None:
+            data = weight_fn(scorer, index, rows, indices, tfs, idfs)
+        else:
+            data = np.fromiter(
+                (scorer.term_weight(index, terms[r], int(d), int(tf)) for r, d, tf in zip(rows, indices, tfs)),
+                dtype=np.float64, count=nnz
+            )
+
+        return cls(vocabulary, indptr, indices, data, len(index), index.version)
+
+    def score(self, query_weights: Sequence[Dict[str, float]]) -> np.ndarray:
+        """Dense (queries x documents) scores for a block of weighted queries"""
+        query_ids, rows, weights = [], [], []
+        for query_id, term_weights in enumerate(query_weights):
+            for term, weight in term_weights.items():
+                row = self.vocabulary.get(term)
+                if row is not None:
+                    query_ids.append(query_id)
+                    rows.append(row)
+                    weights.append(weight)
+
+        num_queries = len(query_weights)
+        if not rows:
+            return np.zeros((num_queries, self.num_docs))
+
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+
+        # Positions of every (query term, posting) pair in indices/data
+        offsets = np.cumsum(counts) - counts
+        positions = np.arange(int(counts.sum())) - np.repeat(offsets, counts) + np.repeat(starts, counts)
+
+        values = self.data[positions] * np.repeat(np.asarray(weights), counts)
+        cells = np.repeat(np.asarray(query_ids, dtype=np.int64), counts) * self.num_docs + self.indices[positions]
+
+        scores = np.bincount(cells, weights=values, minlength=num_queries * self.num_docs)
+        return scores.reshape(num_queries, self.num_docs)
+
+    def top_k(self, query_weights: Sequence[Dict[str, float]], k: int,
+              min_score: float = 0.0) -> List[List[Tuple[int, float]]]:
+        """Top k (doc_id, score) pairs above min_score for every query"""
+        if self.num_docs == 0 or k <= 0:
+            return [[] for _ in query_weights]
+
+        k = min(k, self.num_docs)
+        block_size = max(1, MAX_SCORE_BLOCK // self.num_docs)
+        results = []
+
+        for start in range(0, len(query_weights), block_size):
+            scores = self.score(query_weights[start:start + block_size])
+
+            # k-th best score of every query, found in linear time
+            kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1]
+            cutoff = np.maximum(kth, np.nextafter(min_score, np.inf))
+
+            for row in range(scores.shape[0]):
+                # Everything tied with the k-th score is kept so ties resolve like the Python path
+                doc_ids = np.flatnonzero(scores[row] >= cutoff[row])
+                row_scores = scores[row, doc_ids]
+                # Highest score first, ties go to the document added first
+                order = np.lexsort((doc_ids, -row_scores))[:k]
+                results.append([(int(doc_ids[i]), float(row_scores[i])) for i in order])
+
+        return results
+
+
+def build_matrix(index, scorer: Scorer, current: Optional[SparseTermMatrix] = None) -> SparseTermMatrix:
+    """Return ``current`` if it is up to date with the index, otherwise rebuild it"""
+    if current is not None and current.version == index.version:
+        return current
+    return SparseTermMatrix.from_index(index, scorer)
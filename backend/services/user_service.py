@@ -8,7 +8,10 @@ from typing import List
 from schemas.user import UserDisplay, UserUpdateRequest, AdminUserOut
 from models import User, Role, RoleNameEnum
 from schemas import UserCreate
-from repositories import user_repository
+from repositories import user_repository, book_stats_repository
+from services.user_snippet_cache import user_snippets
+from services.book_search import book_search
+from services.admin_metrics_service import admin_metrics
 from sqlalchemy.orm import selectinload
 
 import os
@@ -57,7 +60,9 @@ async def create_user_service(user_data: UserCreate, db: AsyncSession) -> User:
         )
         user.roles = roles_query.scalars().all()
 
-    return await user_repository.create_user(user, db)
+    user = await user_repository.create_user(user, db)
+    admin_metrics.mark_stale()
+    return user
 
 async def get_user_by_id_service(user_id: int, db: AsyncSession) -> User:
     user = await user_repository.get_user_by_id(user_id, db)
@@ -119,8 +124,12 @@ async def update_user_profile(user_id: int, update: UserUpdateRequest, db: Async
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
 
+    if update.first_name is not None or update.last_name is not None:
+        # Author names are part of the catalog search data
+        await book_search.refresh_author(db, user.id)
     await db.commit()
     await db.refresh(user)
+    await user_snippets.invalidate_everywhere(user.id)
 
     return {"message": "Profile updated successfully"}
 
@@ -150,6 +159,7 @@ async def upload_avatar_service(file: UploadFile, db: AsyncSession, current_user
     user.icon = f"/avatars/{filename}"
     await db.commit()
     await db.refresh(user)
+    await user_snippets.invalidate_everywhere(user.id)
 
     return user
 
@@ -170,6 +180,7 @@ async def delete_avatar_service(db: AsyncSession, current_user: dict):
     user.icon = None
     await db.commit()
     await db.refresh(user)
+    await user_snippets.invalidate_everywhere(user.id)
 
     return {"message": "Avatar deleted"}
 
@@ -200,6 +211,7 @@ async def update_user_role(db, user_id: int, new_role: str):
 
     await db.commit()
     await db.refresh(user)
+    admin_metrics.mark_stale()
 
     return {"detail": "User role updated successfully"}
 
@@ -210,7 +222,10 @@ async def delete_user(db, user_id: int):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    await book_stats_repository.delete_user_activity(db, user_id)
     await db.delete(user)
     await db.commit()
+    await user_snippets.invalidate_everywhere(user_id)
+    admin_metrics.mark_stale()
 
     return {"detail": "User deleted successfully"}
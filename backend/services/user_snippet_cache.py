@@ -0,0 +1,100 @@
+"""
+Process-local cache of the user fields chat frames carry (username, names,
+avatar), so chat traffic does not query ``users`` for every event.
+
+Entries expire after a TTL and the cache is size-bounded (LRU). Profile and
+avatar changes invalidate the user on every worker through the chat
+backplane.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.user import User
+from services.chat_backplane import chat_backplane
+
+MAX_ENTRIES = 10_000
+TTL_SECONDS = 300
+
+
+class UserSnippetCache:
+    """TTL + LRU cache of user display snippets, looked up by id or username"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user_id -> (expires_at, snippet); least recently used first
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._ids_by_username: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, user_id: Optional[int]) -> Optional[Dict]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, snippet = entry
+        if time.monotonic() >= expires_at:
+            self.invalidate(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return snippet
+
+    def _put(self, snippet: Dict) -> Dict:
+        self.invalidate(snippet["id"])
+        self._entries[snippet["id"]] = (time.monotonic() + self.ttl, snippet)
+        self._ids_by_username[snippet["username"]] = snippet["id"]
+        while len(self._entries) > self.max_entries:
+            user_id, (_, evicted) = self._entries.popitem(last=False)
+            self._ids_by_username.pop(evicted["username"], None)
+        return snippet
+
+    async def _load(self, db: AsyncSession, condition) -> Optional[Dict]:
+        self.misses += 1
+        result = await db.execute(
+            select(User.id, User.username, User.first_name, User.last_name, User.icon).where(condition)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return self._put({
+            "id": row.id,
+            "username": row.username,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "icon": row.icon
+        })
+
+    async def get_by_id(self, user_id: int, db: AsyncSession) -> Optional[Dict]:
+        snippet = self._get(user_id)
+        if snippet:
+            self.hits += 1
+            return snippet
+        return await self._load(db, User.id == user_id)
+
+    async def get_by_username(self, username: str, db: AsyncSession) -> Optional[Dict]:
+        snippet = self._get(self._ids_by_username.get(username))
+        if snippet:
+            self.hits += 1
+            return snippet
+        return await self._load(db, User.username == username)
+
+    def invalidate(self, user_id: int):
+        """Drop a user from this worker's cache"""
+        entry = self._entries.pop(user_id, None)
+        if entry:
+            self._ids_by_username.pop(entry[1]["username"], None)
+
+    async def invalidate_everywhere(self, user_id: int):
+        """Drop a user from the cache of every worker"""
+        await chat_backplane.publish("user_snippets", {"user_id": user_id})
+
+    async def _on_invalidate(self, event: dict):
+        self.invalidate(event["user_id"])
+
+
+user_snippets = UserSnippetCache()
+chat_backplane.subscribe("user_snippets", user_snippets._on_invalidate)
@@ -1,34 +1,157 @@
-# import numpy as np
 import json
 import os
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 import pickle
 import asyncio
-from collections import Counter
-from math import sqrt
+from collections import Counter, defaultdict
+from collections.abc import Mapping, Sequence
+
+from services.corpus_store import (
+    CorpusLog, PostingsSegment, Segment, load_current_segment, segment_stamp, write_segment
+)
+
+from services.retrieval_scoring import Scorer, TfIdfScorer, get_scorer, select_top_k
+from services.sparse_retrieval import SparseTermMatrix, build_matrix
 
 class Document:
     def __init__(self, page_content: str, metadata: Dict = None):
         self.page_content = page_content
         self.metadata = metadata or {}
 
-class VectorStoreService:
+class MergedPostings(Mapping):
+    """Read view over a sealed on-disk segment plus in-memory postings for newer documents"""
+
+    def __init__(self, segment: Optional[PostingsSegment], delta: Dict[str, Dict[int, int]]):
+        self.segment = segment
+        self.delta = delta
+
+    def __getitem__(self, term: str) -> Dict[int, int]:
+        base = self.segment.row(term) if self.segment else None
+        extra = self.delta.get(term)
+        if base is None:
+            if extra is None:
+                raise KeyError(term)
+            return extra
+        # Segment doc ids always precede delta doc ids, so order stays ascending
+        if extra:
+            base.update(extra)
+        return base
+
+    def __contains__(self, term) -> bool:
+        return term in self.delta or (self.segment is not None and term in self.segment.vocabulary)
+
+    def __iter__(self):
+        if self.segment:
+            yield from self.segment.vocabulary
+            yield from (term for term in self.delta if term not in self.segment.vocabulary)
+        else:
+            yield from self.delta
+
+    def __len__(self) -> int:
+        if not self.segment:
+            return len(self.delta)
+        return len(self.segment.vocabulary) + sum(1 for term in self.delta if term not in self.segment.vocabulary)
+
+    def doc_freq(self, term: str) -> int:
+        base = self.segment.doc_freq(term) if self.segment else 0
+        return base + len(self.delta.get(term, ()))
+
+class InvertedIndex:
+    """Inverted index over document keywords with corpus statistics"""
+
     def __init__(self):
+        # Sealed, memory-mapped postings for the oldest documents (if any)
+        self.segment: Optional[Segment] = None
+        # term -> {doc_id: term frequency} for documents after the segment
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # raw lowercase word -> {doc_id: 1}, used by the keyword fallback
+        self._word_postings: Dict[str, Dict[int, int]] = {}
+        self.postings = MergedPostings(None, self._postings)
+        self.word_postings = MergedPostings(None, self._word_postings)
+        # Number of keywords in each document
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+        # Bumped on every change so scorers can invalidate cached statistics
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def segment_docs(self) -> int:
+        return self.segment.num_docs if self.segment else 0
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def doc_freq(self, term: str) -> int:
+        return self.postings.doc_freq(term)
+
+    def add(self, doc_id: int, keywords: List[str], words: Set[str]):
+        """Index one document; ids are assigned sequentially by the caller"""
+        for term, tf in Counter(keywords).items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        for word in words:
+            self._word_postings.setdefault(word, {})[doc_id] = 1
+
+        if doc_id >= len(self.doc_lengths):
+            self.doc_lengths.extend([0] * (doc_id + 1 - len(self.doc_lengths)))
+        self.total_length += len(keywords) - self.doc_lengths[doc_id]
+        self.doc_lengths[doc_id] = len(keywords)
+        self.version += 1
+
+    def load_segment(self, segment: Optional[Segment]):
+        """Use a sealed segment as the base and drop all in-memory postings"""
+        self.segment = segment
+        self._postings.clear()
+        self._word_postings.clear()
+        self.postings = MergedPostings(segment.keywords if segment else None, self._postings)
+        self.word_postings = MergedPostings(segment.words if segment else None, self._word_postings)
+        self.doc_lengths = segment.doc_lengths.tolist() if segment else []
+        self.total_length = segment.total_length if segment else 0
+        self.version += 1
+
+    def clear(self):
+        """Drop all postings and statistics"""
+        self.load_segment(None)
+
+class CorpusDocuments(Sequence):
+    """Documents decoded on demand from the memory-mapped corpus log"""
+
+    def __init__(self, log: CorpusLog):
+        self.log = log
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+    def __getitem__(self, doc_id: int) -> Document:
+        record = self.log.read(doc_id)
+        return Document(page_content=record["page_content"], metadata=record.get("metadata"))
+
+# Documents indexed in memory beyond the sealed segment before it is rewritten
+COMPACTION_THRESHOLD = 1000
+# An unsealed tail at least this long is sealed on startup instead of re-indexed by every worker
+STARTUP_COMPACTION_THRESHOLD = 100
+
+class VectorStoreService:
+    def __init__(self, scorer: Optional[Scorer] = None, backend: Optional[str] = None):
         print("🔧 Initializing Model-Free Vector Store...")
         
-        self.documents = []
-        self.vector_db_path = "./data/vector_db"
+        self.index = InvertedIndex()
+        self._segment_stamp: Optional[int] = None
         
-        # Create directories
-        os.makedirs(self.vector_db_path, exist_ok=True)
-        os.makedirs("./data/knowledge_base", exist_ok=True)
-        
-        # Initialize knowledge base
-        self._initialize_knowledge_base()
+        # Ranking function, BM25 unless configured otherwise
+        self.scorer = scorer or get_scorer(os.getenv("VECTOR_STORE_SCORER", "bm25"))
+        self._similarity_scorer = TfIdfScorer()
         
-        # Try to load existing documents
-        self._load_existing_documents()
+        # "python" walks the postings per query, "numpy" scores through the sparse matrix
+        self.backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "python")).lower()
+        if self.backend not in ("python", "numpy"):
+            raise ValueError(f"Unknown vector store backend '{self.backend}'")
+        self._matrix: Optional[SparseTermMatrix] = None
+        self.vector_db_path = "./data/vector_db"
         
         # Common words to filter out (stop words)
         self.stop_words = {
@@ -43,25 +166,47 @@ class VectorStoreService:
             'further', 'then', 'once', 'can', 'could', 'would', 'should'
         }
         
+        # Create directories
+        os.makedirs(self.vector_db_path, exist_ok=True)
+        os.makedirs("./data/knowledge_base", exist_ok=True)
+        
+        # Append-only corpus, shared with other workers through mmap
+        self.corpus = CorpusLog(self.vector_db_path)
+        self.documents = CorpusDocuments(self.corpus)
+        
+        # Try to load existing documents
+        self._load_existing_documents()
+        
+        # Seed the knowledge base on first start
+        self._initialize_knowledge_base()
+        
+        # Seal a leftover tail so later starts map it instead of re-tokenizing
+        if len(self.index) - self.index.segment_docs >= STARTUP_COMPACTION_THRESHOLD:
+            self.compact(force=True)
+        
         print("✅ Model-Free Vector Store initialized")
     
     def _load_existing_documents(self):
-        """Try to load existing documents"""
+        """Map the on-disk corpus, migrating a legacy documents.pkl on first start"""
         docs_file = os.path.join(self.vector_db_path, "documents.pkl")
+        migrated = False
         
-        if os.path.exists(docs_file):
+        if not len(self.corpus) and os.path.exists(docs_file):
             try:
                 with open(docs_file, 'rb') as f:
                     saved_docs = pickle.load(f)
-                    # Only add if we don't already have documents
-                    if not self.documents:
-                        self.documents = saved_docs
-                        print(f"✅ Loaded {len(self.documents)} existing documents")
-                        return True
+                if self.corpus.append([self._to_record(doc) for doc in saved_docs], expected_count=0):
+                    print(f"✅ Migrated {len(saved_docs)} documents from documents.pkl")
+                    migrated = True
             except Exception as e:
-                print(f"⚠️ Could not load existing documents: {e}")
+                print(f"⚠️ Could not migrate existing documents: {e}")
         
-        return False
+        self._use_segment(load_current_segment(self.vector_db_path))
+        if migrated:
+            self.compact(force=True)
+        if self.documents:
+            print(f"✅ Loaded {len(self.documents)} existing documents")
+        return bool(self.documents)
     
     def _initialize_knowledge_base(self):
         """Initialize with comprehensive Bookify knowledge"""
@@ -130,14 +275,17 @@ class VectorStoreService:
         
         # Only initialize if we don't have documents yet
         if not self.documents:
-            for item in knowledge_items:
-                doc = Document(
-                    page_content=item["content"],
-                    metadata={"source": item["source"]}
-                )
-                self.documents.append(doc)
-            
-            print(f"✅ Initialized knowledge base with {len(self.documents)} documents")
+            records = [
+                {"page_content": item["content"], "metadata": {"source": item["source"]}}
+                for item in knowledge_items
+            ]
+            # Another worker may seed concurrently; only the first append wins
+            seeded = self.corpus.append(records, expected_count=0)
+            if seeded:
+                print(f"✅ Initialized knowledge base with {len(records)} documents")
+            self.refresh()
+            if seeded:
+                self.compact(force=True)
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract meaningful keywords from text"""
@@ -150,31 +298,58 @@ class VectorStoreService:
         
         return keywords
     
-    def _calculate_tf_idf_similarity(self, query_keywords: List[str], doc_keywords: List[str]) -> float:
-        """Calculate TF-IDF-like similarity between query and document keywords"""
-        if not query_keywords or not doc_keywords:
-            return 0.0
-        
-        # Create word frequency counts
-        query_freq = Counter(query_keywords)
-        doc_freq = Counter(doc_keywords)
-        
-        # Get all unique words
-        all_words = set(query_keywords + doc_keywords)
-        
-        # Calculate similarity using cosine similarity of frequency vectors
-        dot_product = sum(query_freq[word] * doc_freq[word] for word in all_words)
-        
-        query_magnitude = sqrt(sum(freq ** 2 for freq in query_freq.values()))
-        doc_magnitude = sqrt(sum(freq ** 2 for freq in doc_freq.values()))
-        
-        if query_magnitude == 0 or doc_magnitude == 0:
-            return 0.0
+    def _index_document(self, doc_id: int, doc: Document):
+        """Add a single document to the inverted index"""
+        keywords = self._extract_keywords(doc.page_content)
+        words = set(doc.page_content.lower().split())
+        self.index.add(doc_id, keywords, words)
+    
+    @staticmethod
+    def _to_record(doc: Document) -> Dict:
+        return {"page_content": doc.page_content, "metadata": doc.metadata}
+    
+    def _use_segment(self, segment):
+        """Switch the index to a sealed segment and index the documents after it"""
+        self._segment_stamp = segment_stamp(self.vector_db_path)
+        self.index.load_segment(segment)
+        self.refresh()
+    
+    def refresh(self) -> int:
+        """Index documents appended to the corpus by this or any other worker"""
+        count = self.corpus.remap()
+        for doc_id in range(len(self.index), count):
+            self._index_document(doc_id, self.documents[doc_id])
         
-        return dot_product / (query_magnitude * doc_magnitude)
+        # Swap a large in-memory tail for a segment another worker has sealed
+        if len(self.index) - self.index.segment_docs >= COMPACTION_THRESHOLD:
+            if segment_stamp(self.vector_db_path) != self._segment_stamp:
+                segment = load_current_segment(self.vector_db_path)
+                if segment and segment.num_docs > self.index.segment_docs:
+                    self._use_segment(segment)
+        return count
+    
+    def compact(self, force: bool = False):
+        """Seal the in-memory postings into a new memory-mapped segment"""
+        with self.corpus.locked():
+            # Another worker may already have written a newer segment
+            current = load_current_segment(self.vector_db_path)
+            if current and current.num_docs > self.index.segment_docs:
+                self._use_segment(current)
+            
+            pending = len(self.index) - self.index.segment_docs
+            if pending and (force or pending >= COMPACTION_THRESHOLD):
+                generation = current.generation + 1 if current else 1
+                write_segment(self.vector_db_path, generation, self.index)
+                self._use_segment(load_current_segment(self.vector_db_path))
+                print(f"✅ Compacted {len(self.index)} documents into segment {generation}")
+    
+    def calculate_similarity(self, query_keywords: List[str], doc_keywords: List[str]) -> float:
+        """TF-IDF cosine similarity (0..1) between two keyword lists using corpus statistics"""
+        return self._similarity_scorer.similarity(self.index, query_keywords, doc_keywords)
     
     async def similarity_search(self, query: str, k: int = 3) -> List[Document]:
-        """Search for similar documents using TF-IDF similarity"""
+        """Search for similar documents using the configured scorer"""
+        self.refresh()
         if not self.documents:
             return []
         
@@ -184,21 +359,12 @@ class VectorStoreService:
         if not query_keywords:
             return self._keyword_search(query, k)
         
-        # Calculate similarity scores for all documents
-        scored_docs = []
-        
-        for doc in self.documents:
-            doc_keywords = self._extract_keywords(doc.page_content)
-            similarity = self._calculate_tf_idf_similarity(query_keywords, doc_keywords)
-            
-            if similarity > 0.05:  # Minimum similarity threshold
-                scored_docs.append((similarity, doc))
-        
-        # Sort by similarity score (descending) and return top k
-        scored_docs.sort(reverse=True, key=lambda x: x[0])
-        
-        # Return top k documents
-        result_docs = [doc for _, doc in scored_docs[:k]]
+        if self.backend == "numpy":
+            top_docs = self._matrix_top_k([query_keywords], k)[0]
+        else:
+            # Only the postings of the query terms are scored; top k kept in a bounded heap
+            top_docs = self.scorer.top_k(self.index, query_keywords, k)
+        result_docs = [self.documents[doc_id] for doc_id, _ in top_docs]
         
         # If no good matches, fall back to keyword search
         if not result_docs:
@@ -206,22 +372,47 @@ class VectorStoreService:
         
         return result_docs
     
+    async def similarity_search_batch(self, queries: List[str], k: int = 3) -> List[List[Document]]:
+        """Score many queries at once against the sparse term-document matrix"""
+        self.refresh()
+        if not self.documents:
+            return [[] for _ in queries]
+        
+        keyword_lists = [self._extract_keywords(query) for query in queries]
+        # The index is only read on the event loop; the thread gets the immutable
+        # matrix and plain query weights, so concurrent refreshes cannot race it
+        matrix, query_weights = self._prepare_matrix_query(keyword_lists)
+        ranked = await asyncio.to_thread(matrix.top_k, query_weights, k, self.scorer.min_score)
+        
+        results = []
+        for query, top_docs in zip(queries, ranked):
+            result_docs = [self.documents[doc_id] for doc_id, _ in top_docs]
+            results.append(result_docs or self._keyword_search(query, k))
+        return results
+    
+    def _prepare_matrix_query(self, keyword_lists: List[List[str]]) -> Tuple[SparseTermMatrix, List[Dict[str, float]]]:
+        """Up-to-date sparse matrix (rebuilt lazily) and the weights of each keyword list"""
+        self._matrix = build_matrix(self.index, self.scorer, self._matrix)
+        query_weights = [self.scorer.query_weights(self.index, keywords) for keywords in keyword_lists]
+        return self._matrix, query_weights
+    
+    def _matrix_top_k(self, keyword_lists: List[List[str]], k: int) -> List[List[tuple]]:
+        """Rank keyword lists through the sparse matrix"""
+        matrix, query_weights = self._prepare_matrix_query(keyword_lists)
+        return matrix.top_k(query_weights, k, self.scorer.min_score)
+    
     def _keyword_search(self, query: str, k: int = 3) -> List[Document]:
         """Fallback keyword-based search"""
         query_words = set(query.lower().split())
         
         # Score documents based on keyword overlap
-        scored_docs = []
-        for doc in self.documents:
-            content_words = set(doc.page_content.lower().split())
-            score = len(query_words.intersection(content_words))
-            
-            if score > 0:
-                scored_docs.append((score, doc))
+        overlap = defaultdict(int)
+        for word in query_words:
+            for doc_id in self.index.word_postings.get(word, ()):
+                overlap[doc_id] += 1
         
-        # Sort by score and return top k
-        scored_docs.sort(reverse=True, key=lambda x: x[0])
-        return [doc for _, doc in scored_docs[:k]]
+        # Return top k by overlap
+        return [self.documents[doc_id] for doc_id, _ in select_top_k(overlap.items(), k)]
     
     def add_documents(self, new_documents: List[Document]):
         """Add new documents to the vector store"""
@@ -230,13 +421,12 @@ class VectorStoreService:
         
         print(f"📝 Adding {len(new_documents)} new documents...")
         
-        # Add to document list
-        self.documents.extend(new_documents)
+        # Append to the corpus log, then index everything not yet indexed
+        self.corpus.append([self._to_record(doc) for doc in new_documents])
+        self.refresh()
         
-        # Save updated document list
-        docs_file = os.path.join(self.vector_db_path, "documents.pkl")
-        with open(docs_file, 'wb') as f:
-            pickle.dump(self.documents, f)
+        if len(self.index) - self.index.segment_docs >= COMPACTION_THRESHOLD:
+            self.compact()
         
         print(f"✅ Added {len(new_documents)} new documents to vector store")
     
@@ -244,7 +434,12 @@ class VectorStoreService:
         """Get vector store status"""
         return {
             "total_documents": len(self.documents),
-            "search_method": "TF-IDF + Keyword Search",
+            "search_method": f"{self.scorer.name.upper()} + Keyword Search",
+            "indexed_terms": len(self.index.postings),
+            "backend": self.backend,
+            "segment_documents": self.index.segment_docs,
+            "pending_documents": len(self.index) - self.index.segment_docs,
+            "avg_document_length": round(self.index.avg_doc_length, 2),
             "model_free": True,
             "ready": True
         }
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Non-blocking delivery of WebSocket frames.
+
+Every connected socket gets a ``ClientConnection`` with a bounded send
+queue drained by its own task. Broadcasting serializes the payload once and
+only enqueues the resulting text, so one slow or dead client never delays
+the others. A client whose queue overflows, or whose send does not complete
+within the timeout, is evicted and its socket closed.
+
+Send timeouts are checked when new frames are queued rather than by wrapping
+every send in ``wait_for``, which would cost a task per frame per client.
+
+``heartbeat`` pings clients periodically. Clients answer with a ``pong``
+frame (any frame counts), and a socket that stays silent past the idle
+timeout is half-open or abandoned, so it is reaped.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Iterable, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = 256
+SEND_TIMEOUT_SECONDS = 5.0
+# "Try again later"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# "Going away"
+IDLE_CLOSE_CODE = 1001
+
+HEARTBEAT_INTERVAL_SECONDS = 20
+# Two missed pings and a bit of slack
+IDLE_TIMEOUT_SECONDS = 50
+
+
+def encode(message: dict) -> str:
+    """Serialize a frame the same way ``WebSocket.send_json`` does"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class ClientConnection:
+    """A WebSocket with its own bounded send queue and sender task"""
+
+    def __init__(self, websocket: WebSocket, on_evict: Optional[Callable[["ClientConnection"], None]] = None,
+                 max_queue: int = SEND_QUEUE_SIZE, send_timeout: float = SEND_TIMEOUT_SECONDS):
+        self.websocket = websocket
+        self.on_evict = on_evict
+        self.send_timeout = send_timeout
+        self.closed = False
+        # Last frame received from the client
+        self.last_seen = time.monotonic()
+        # Start of the send in progress, None while idle
+        self._sending_since: Optional[float] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task = asyncio.create_task(self._sender())
+
+    def send_text(self, text: str) -> bool:
+        """Queue an encoded frame; evicts the client if it has fallen too far behind"""
+        if self.closed:
+            return False
+        if self._sending_since is not None and time.monotonic() - self._sending_since > self.send_timeout:
+            self.evict("send timed out")
+            return False
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.evict("send queue full")
+            return False
+
+    def send_json(self, message: dict) -> bool:
+        return self.send_text(encode(message))
+
+    def touch(self):
+        """Record that the client is alive (call on every received frame)"""
+        self.last_seen = time.monotonic()
+
+    async def _sender(self):
+        try:
+            while True:
+                text = await self._queue.get()
+                self._sending_since = time.monotonic()
+                await self.websocket.send_text(text)
+                self._sending_since = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.evict(f"send failed: {e}")
+
+    def evict(self, reason: str, code: int = SLOW_CONSUMER_CLOSE_CODE):
+        """Drop a client that cannot keep up (or has gone silent) and close its socket"""
+        if self.closed:
+            return
+        logger.warning(f"⚠️ Evicting WebSocket client: {reason}")
+        self.close()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+    def close(self):
+        """Stop delivering to this client (the socket itself is left to its handler)"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+        if self.on_evict:
+            self.on_evict(self)
+
+
+def fan_out(connections: Iterable[ClientConnection], message: dict) -> int:
+    """Serialize once and enqueue for every connection; returns how many accepted it"""
+    text = encode(message)
+    return sum(connection.send_text(text) for connection in list(connections))
+
+
+PING_FRAME = encode({"type": "ping"})
+
+
+def heartbeat(connections: Iterable[ClientConnection], idle_timeout: float = IDLE_TIMEOUT_SECONDS) -> int:
+    """Ping every connection and reap the ones silent for too long; returns how many were reaped"""
+    now = time.monotonic()
+    reaped = 0
+    for connection in list(connections):
+        if now - connection.last_seen > idle_timeout:
+            connection.evict("idle", code=IDLE_CLOSE_CODE)
+            reaped += 1
+        else:
+            connection.send_text(PING_FRAME)
+    return reaped
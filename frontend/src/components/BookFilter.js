@@ -1,6 +1,8 @@
 import { useState, useEffect } from "react";
 
-function BookFilter({ onResults, baseBooks = null }) {
+// With onSearch the filters go to the server as query params and the parent
+// loads the pages; with baseBooks a local list is filtered through onResults.
+function BookFilter({ onResults, onSearch, baseBooks = null }) {
   const [selectedGenres, setSelectedGenres] = useState([]);
   const [genres, setGenres] = useState([]);
   const [author, setAuthor] = useState("");
@@ -62,10 +64,23 @@ function BookFilter({ onResults, baseBooks = null }) {
     });
   };
 
+  const buildParams = () => {
+    const params = new URLSearchParams();
+    selectedGenres.forEach((g) => params.append("genre", g));
+    if (author) params.append("author", author);
+    if (keywords) params.append("keywords", keywords);
+    if (minRating) params.append("min_rating", minRating);
+    if (sortBy) params.append("sort", sortBy);
+    if (sortDir) params.append("direction", sortDir);
+    return params;
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
 
-    if (baseBooks) {
+    if (onSearch) {
+      onSearch(buildParams());
+    } else if (baseBooks) {
       let filtered = [...baseBooks];
 
       if (selectedGenres.length > 0) {
@@ -99,33 +114,6 @@ function BookFilter({ onResults, baseBooks = null }) {
       const enriched = await enrichWithRatings(filtered);
       const sorted = sortBooks(enriched);
       onResults(sorted);
-    } else {
-      const params = new URLSearchParams();
-      selectedGenres.forEach((g) => params.append("genre", g));
-      if (author) params.append("author", author);
-      if (keywords) params.append("keywords", keywords);
-      if (sortBy && sortBy !== "rating") params.append("sort", sortBy);
-      if (sortDir) params.append("direction", sortDir);
-
-      const res = await fetch(
-        params.toString()
-          ? `http://localhost:8000/books?${params}`
-          : `http://localhost:8000/books`
-      );
-      const data = await res.json();
-      const enriched = await enrichWithRatings(data);
-
-      let filtered = enriched;
-      if (minRating) {
-        filtered = filtered.filter(
-          (book) =>
-            book.average_rating != null &&
-            book.average_rating >= parseFloat(minRating)
-        );
-      }
-
-      const sorted = sortBooks(filtered);
-      onResults(sorted);
     }
   };
 
@@ -137,14 +125,11 @@ function BookFilter({ onResults, baseBooks = null }) {
     setSortBy("");
     setSortDir("asc");
 
-    if (baseBooks) {
+    if (onSearch) {
+      onSearch(new URLSearchParams());
+    } else if (baseBooks) {
       const enriched = await enrichWithRatings(baseBooks);
       onResults(enriched);
-    } else {
-      const res = await fetch("http://localhost:8000/books");
-      const data = await res.json();
-      const enriched = await enrichWithRatings(data);
-      onResults(enriched);
     }
   };
 
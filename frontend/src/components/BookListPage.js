@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 import { Link } from "react-router-dom";
 import {
   Card,
@@ -12,48 +12,47 @@ import {
   Grid,
   Container,
   Box,
-  Pagination,
+  Button,
 } from "@mui/material";
 import FavoriteIcon from "@mui/icons-material/Favorite";
 // import ShoppingCartIcon from "@mui/icons-material/ShoppingCart";
 import BookFilter from "./BookFilter";
 import { useAuth } from "../contexts/AuthContext";
 import DownloadForOfflineIcon from "@mui/icons-material/DownloadForOffline";
+import { fetchBooksPage } from "../services/bookService";
 
 function BookListPage() {
   const [books, setBooks] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [isFetching, setIsFetching] = useState(false);
   const [error, setError] = useState(null);
-  const [currentPage, setCurrentPage] = useState(1);
-
-  const booksPerPage = 8;
-  const totalPages = Math.ceil(books.length / booksPerPage);
-  const indexOfLastBook = currentPage * booksPerPage;
-  const indexOfFirstBook = indexOfLastBook - booksPerPage;
-  const currentBooks = books.slice(indexOfFirstBook, indexOfLastBook);
+  // Current filters and the cursor of the next page (null on the last page)
+  const [query, setQuery] = useState(new URLSearchParams());
+  const [nextCursor, setNextCursor] = useState(null);
   const { user } = useAuth();
   const [favouriteBookIds, setFavouriteBookIds] = useState([]);
 
-  useEffect(() => {
-    const fetchBooks = async () => {
-      setIsLoading(true);
-      setError(null);
-      try {
-        const response = await fetch("http://localhost:8000/books");
-        if (!response.ok) {
-          throw new Error(`Error ${response.status}: Unable to fetch books.`);
-        }
-
-        const booksData = await response.json();
+  // Loads one page; without a cursor it replaces the list, otherwise appends to it
+  const loadBooks = useCallback(async (params, cursor = null) => {
+    setIsFetching(true);
+    setError(null);
+    try {
+      const page = await fetchBooksPage(params, cursor);
+      setBooks((prev) => (cursor ? [...prev, ...page.books] : page.books));
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError(err.message || "An error occurred.");
+    } finally {
+      setIsFetching(false);
+      setIsLoading(false);
+    }
+  }, []);
 
-        setBooks(booksData);
-      } catch (err) {
-        setError(err.message || "An error occurred.");
-      } finally {
-        setIsLoading(false);
-      }
-    };
+  useEffect(() => {
+    loadBooks(new URLSearchParams());
+  }, [loadBooks]);
 
+  useEffect(() => {
     const fetchFavourites = async () => {
       if (!user) return;
 
@@ -78,13 +77,12 @@ function BookListPage() {
       }
     };
 
-    fetchBooks();
     fetchFavourites();
   }, [user]);
 
-  const handlePageChange = (event, value) => {
-    setCurrentPage(value);
-    window.scrollTo({ top: 0, behavior: "smooth" });
+  const handleSearch = (params) => {
+    setQuery(params);
+    loadBooks(params);
   };
 
   const toggleFavourite = async (bookId) => {
@@ -153,7 +151,7 @@ function BookListPage() {
       </Typography>
 
       <Box sx={{ my: 4 }}>
-        <BookFilter onResults={setBooks} />
+        <BookFilter onSearch={handleSearch} />
       </Box>
 
       {books.length === 0 ? (
@@ -163,7 +161,7 @@ function BookListPage() {
       ) : (
         <>
           <Grid container spacing={4} justifyContent="center">
-            {currentBooks.map((book) => (
+            {books.map((book) => (
               <Grid item key={book.id} xs={12} sm={6} md={4} lg={3}>
                 <Card
                   sx={{
@@ -287,15 +285,18 @@ function BookListPage() {
             ))}
           </Grid>
 
-          <Box sx={{ mt: 6, display: "flex", justifyContent: "center" }}>
-            <Pagination
-              count={totalPages}
-              page={currentPage}
-              onChange={handlePageChange}
-              color="primary"
-              size="medium"
-            />
-          </Box>
+          {nextCursor && (
+            <Box sx={{ mt: 6, display: "flex", justifyContent: "center" }}>
+              <Button
+                variant="outlined"
+                disabled={isFetching}
+                onClick={() => loadBooks(query, nextCursor)}
+                sx={{ color: "#4e796b", borderColor: "#66b2a0" }}
+              >
+                {isFetching ? "Loading..." : "Load more"}
+              </Button>
+            </Box>
+          )}
         </>
       )}
     </Container>
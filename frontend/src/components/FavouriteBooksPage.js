@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useCallback, useEffect, useState } from "react";
 import {
   Card,
   CardHeader,
@@ -11,7 +11,7 @@ import {
   Grid,
   Container,
   Box,
-  Pagination,
+  Button,
 } from "@mui/material";
 import FavoriteIcon from "@mui/icons-material/Favorite";
 import ShoppingCartIcon from "@mui/icons-material/ShoppingCart";
@@ -19,58 +19,50 @@ import DownloadForOfflineIcon from "@mui/icons-material/DownloadForOffline";
 import { useAuth } from "../contexts/AuthContext";
 import BookFilter from "../components/BookFilter";
 import { Link } from "react-router-dom";
+import { fetchFavouriteBooksPage } from "../services/bookService";
 
 function FavouriteBooksPage() {
   const [books, setBooks] = useState([]);
-  const [originalBooks, setOriginalBooks] = useState([]);
-  const [favouriteBookIds, setFavouriteBookIds] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [isFetching, setIsFetching] = useState(false);
   const [error, setError] = useState(null);
-  const [currentPage, setCurrentPage] = useState(1);
+  // Current filters and the cursor of the next page (null on the last page)
+  const [query, setQuery] = useState(new URLSearchParams());
+  const [nextCursor, setNextCursor] = useState(null);
   const { user } = useAuth();
 
-  const booksPerPage = 8;
-  const indexOfLastBook = currentPage * booksPerPage;
-  const indexOfFirstBook = indexOfLastBook - booksPerPage;
-  const currentBooks = books.slice(indexOfFirstBook, indexOfLastBook);
-  const totalPages = Math.ceil(books.length / booksPerPage);
+  // Loads one page; without a cursor it replaces the list, otherwise appends to it
+  const loadBooks = useCallback(async (params, cursor = null) => {
+    setIsFetching(true);
+    setError(null);
+    try {
+      const page = await fetchFavouriteBooksPage(params, cursor);
+      setBooks((prev) => (cursor ? [...prev, ...page.books] : page.books));
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError("Failed to load favourite books.");
+    } finally {
+      setIsFetching(false);
+      setIsLoading(false);
+    }
+  }, []);
 
   useEffect(() => {
-    const fetchFavourites = async () => {
-      try {
-        const res = await fetch("http://localhost:8000/books/favourites", {
-          credentials: "include",
-        });
-        const ids = await res.json();
-        setFavouriteBookIds(ids);
-
-        const booksRes = await fetch("http://localhost:8000/books", {
-          credentials: "include",
-        });
-        const allBooks = await booksRes.json();
-
-        const favBooks = allBooks.filter((book) => ids.includes(book.id));
-
-        setOriginalBooks(favBooks);
-        setBooks(favBooks);
-      } catch (err) {
-        setError("Failed to load favourite books.");
-      } finally {
-        setIsLoading(false);
-      }
-    };
-
-    if (user) fetchFavourites();
-  }, [user]);
+    if (user) loadBooks(new URLSearchParams());
+  }, [user, loadBooks]);
 
-  const toggleFavourite = async (bookId) => {
-    const isFavourite = favouriteBookIds.includes(bookId);
+  const handleSearch = (params) => {
+    setQuery(params);
+    loadBooks(params);
+  };
 
+  // Every listed book is a favourite, so the button always removes it
+  const removeFavourite = async (bookId) => {
     try {
       const response = await fetch(
         `http://localhost:8000/books/favourites/${bookId}`,
         {
-          method: isFavourite ? "DELETE" : "POST",
+          method: "DELETE",
           credentials: "include",
         }
       );
@@ -78,26 +70,12 @@ function FavouriteBooksPage() {
       const data = await response.json();
       if (!response.ok) throw new Error(data.detail);
 
-      setFavouriteBookIds((prev) =>
-        isFavourite ? prev.filter((id) => id !== bookId) : [...prev, bookId]
-      );
-
-      setBooks((prevBooks) =>
-        isFavourite ? prevBooks.filter((b) => b.id !== bookId) : prevBooks
-      );
-      setOriginalBooks((prevBooks) =>
-        isFavourite ? prevBooks.filter((b) => b.id !== bookId) : prevBooks
-      );
+      setBooks((prevBooks) => prevBooks.filter((b) => b.id !== bookId));
     } catch (err) {
       alert("Something went wrong.");
     }
   };
 
-  const handlePageChange = (event, value) => {
-    setCurrentPage(value);
-    window.scrollTo({ top: 0, behavior: "smooth" });
-  };
-
   if (isLoading) {
     return (
       <Container sx={{ mt: 6, pb: 6 }}>
@@ -132,18 +110,18 @@ function FavouriteBooksPage() {
       ) : books.length === 0 ? (
         <>
           <Box sx={{ my: 4 }}>
-            <BookFilter baseBooks={originalBooks} onResults={setBooks} />
+            <BookFilter onSearch={handleSearch} />
           </Box>
           <Typography align="center">No favourites found.</Typography>
         </>
       ) : (
         <>
           <Box sx={{ my: 4 }}>
-            <BookFilter baseBooks={originalBooks} onResults={setBooks} />
+            <BookFilter onSearch={handleSearch} />
           </Box>
 
           <Grid container spacing={4} justifyContent="center">
-            {currentBooks.map((book) => (
+            {books.map((book) => (
               <Grid item key={book.id} xs={12} sm={6} md={4} lg={3}>
                 <Card
                   sx={{
@@ -223,7 +201,7 @@ function FavouriteBooksPage() {
                     </Box>
                   </CardContent>
                   <CardActions sx={{ px: 2, pb: 2 }}>
-                    <IconButton onClick={() => toggleFavourite(book.id)}>
+                    <IconButton onClick={() => removeFavourite(book.id)}>
                       <FavoriteIcon sx={{ color: "red" }} />
                     </IconButton>
                     <IconButton>
@@ -252,15 +230,18 @@ function FavouriteBooksPage() {
             ))}
           </Grid>
 
-          <Box sx={{ mt: 6, display: "flex", justifyContent: "center" }}>
-            <Pagination
-              count={totalPages}
-              page={currentPage}
-              onChange={handlePageChange}
-              color="primary"
-              size="medium"
-            />
-          </Box>
+          {nextCursor && (
+            <Box sx={{ mt: 6, display: "flex", justifyContent: "center" }}>
+              <Button
+                variant="outlined"
+                disabled={isFetching}
+                onClick={() => loadBooks(query, nextCursor)}
+                sx={{ color: "#4e796b", borderColor: "#66b2a0" }}
+              >
+                {isFetching ? "Loading..." : "Load more"}
+              </Button>
+            </Box>
+          )}
         </>
       )}
     </Container>
@@ -31,6 +31,8 @@ export default function Header({ onOnlineUsersChange }) {
   const [conversations, setConversations] = React.useState([]);
   const [messageAnchorEl, setMessageAnchorEl] = React.useState(null);
   const [onlineUsers, setOnlineUsers] = React.useState([]);
+  // Unread total over every conversation, not only the first inbox page
+  const [totalUnread, setTotalUnread] = React.useState(0);
   const isMessageMenuOpen = Boolean(messageAnchorEl);
   const location = useLocation();
 
@@ -60,11 +62,6 @@ export default function Header({ onOnlineUsersChange }) {
     setMessageAnchorEl(null);
   };
 
-  const totalUnread = conversations.reduce(
-    (acc, c) => acc + (c.unread_count || 0),
-    0
-  );
-
   // const fetchInbox = () => {
   //   fetch(`http://localhost:8000/chat/inbox/${user.id}`, {
   //     credentials: "include",
@@ -78,7 +75,11 @@ export default function Header({ onOnlineUsersChange }) {
     fetch(`http://localhost:8000/chat/inbox/${user.id}`, {
       credentials: "include",
     })
-      .then((res) => res.json())
+      .then((res) => {
+        const unreadTotal = parseInt(res.headers.get("X-Unread-Total"), 10);
+        setTotalUnread(Number.isNaN(unreadTotal) ? 0 : unreadTotal);
+        return res.json();
+      })
       .then(setConversations)
       .catch((err) => console.error("Failed to load inbox in header:", err));
   }, [user?.id]);
@@ -116,6 +117,12 @@ export default function Header({ onOnlineUsersChange }) {
       headerWS.current.onmessage = (event) => {
         const data = JSON.parse(event.data);
 
+        // Heartbeat: the server closes sockets that stop answering
+        if (data.type === "ping") {
+          headerWS.current.send(JSON.stringify({ type: "pong" }));
+          return;
+        }
+
         if (
           data.type === "unread_count_update" ||
           data.type === "private_message"
@@ -8,6 +8,7 @@ import {
   Stack,
   CircularProgress,
   Badge,
+  Button,
 } from "@mui/material";
 import { useAuth } from "../contexts/AuthContext";
 import { useNavigate } from "react-router-dom";
@@ -16,6 +17,8 @@ export default function Inbox({ onlineUsers = [] }) {
   const { user } = useAuth();
   const [conversations, setConversations] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const navigate = useNavigate();
 
   const userRole =
@@ -28,16 +31,24 @@ export default function Inbox({ onlineUsers = [] }) {
   const formatTime = (iso) =>
     new Date(iso).toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" });
 
+  // Inbox is paged; the next page's position comes in the X-Next-Cursor header
+  const fetchInboxPage = async (before = null) => {
+    const params = before ? `?${new URLSearchParams({ before })}` : "";
+    const res = await fetch(`http://localhost:8000/chat/inbox/${user.id}${params}`, {
+      credentials: "include",
+    });
+    if (!res.ok) throw new Error(`Error ${res.status}: Unable to load inbox.`);
+    return { data: await res.json(), cursor: res.headers.get("X-Next-Cursor") };
+  };
+
   // 🔁 Fetch inbox
   useEffect(() => {
     if (!user?.id) return;
 
-    fetch(`http://localhost:8000/chat/inbox/${user.id}`, {
-      credentials: "include",
-    })
-      .then((res) => res.json())
-      .then((data) => {
+    fetchInboxPage()
+      .then(({ data, cursor }) => {
         setConversations(data);
+        setNextCursor(cursor);
         setLoading(false);
       })
       .catch((err) => {
@@ -46,6 +57,21 @@ export default function Inbox({ onlineUsers = [] }) {
       });
   }, [user]);
 
+  const loadMoreConversations = async () => {
+    setLoadingMore(true);
+    try {
+      const { data, cursor } = await fetchInboxPage(nextCursor);
+      setConversations((prev) => [
+        ...prev,
+        ...data.filter((conv) => !prev.some((c) => c.id === conv.id)),
+      ]);
+      setNextCursor(cursor);
+    } catch (err) {
+      console.error("Failed to load more conversations:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   if (loading) {
     return (
@@ -140,6 +166,14 @@ export default function Inbox({ onlineUsers = [] }) {
           );
         })}
       </Stack>
+
+      {nextCursor && (
+        <Box sx={{ display: "flex", justifyContent: "center", mt: 2 }}>
+          <Button onClick={loadMoreConversations} disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </Box>
+      )}
     </Box>
   );
 }
@@ -75,6 +75,7 @@ const PrivateChat = () => {
       : "reader";
 
   const [messages, setMessages] = useState([]);
+  const [olderCursor, setOlderCursor] = useState(null);
   const [input, setInput] = useState("");
   const [anchorEl, setAnchorEl] = useState(null);
   const [selectedId, setSelectedId] = useState(null);
@@ -84,6 +85,7 @@ const PrivateChat = () => {
   const [typingUser, setTypingUser] = useState(null);
 
   const typingTimeoutRef = useRef(null);
+  const lastTypingSent = useRef(0);
   const chatEndRef = useRef(null);
   const ws = useRef(null);
   const emojiButtonRef = useRef(null);
@@ -93,7 +95,11 @@ const PrivateChat = () => {
   };
 
   const handleTyping = () => {
+    // The server throttles typing frames anyway; no need to send every keystroke
+    const now = Date.now();
+    if (now - lastTypingSent.current < 1000) return;
     if (ws.current && ws.current.readyState === WebSocket.OPEN) {
+      lastTypingSent.current = now;
       ws.current.send(
         JSON.stringify({
           type: "typing",
@@ -114,6 +120,7 @@ useEffect(() => {
     })
     .then((res) => {
       setMessages(res.data);
+      setOlderCursor(res.headers["x-next-cursor"] || null);
       scrollToBottom();
     })
     .catch((err) => console.error("❌ Greška kod dohvata historije:", err));
@@ -132,6 +139,12 @@ useEffect(() => {
   ws.current.onmessage = (event) => {
     const data = JSON.parse(event.data);
 
+    // Heartbeat: the server closes sockets that stop answering
+    if (data.type === "ping") {
+      ws.current.send(JSON.stringify({ type: "pong" }));
+      return;
+    }
+
     if (data.type === "private_message") {
       const isRelevant =
         (data.sender_id === senderId && data.receiver_id == receiverId) ||
@@ -141,6 +154,10 @@ useEffect(() => {
         setMessages((prev) => [...prev, data]);
         scrollToBottom();
       }
+
+      if (data.sender_id == receiverId) {
+        setTypingUser(null);
+      }
     }
 
     if (data.type === "private_delete") {
@@ -161,11 +178,16 @@ useEffect(() => {
 
     if (data.type === "private_typing") {
       if (data.sender_id === parseInt(receiverId)) {
-        setTypingUser(data.username);
         clearTimeout(typingTimeoutRef.current);
-        typingTimeoutRef.current = setTimeout(() => {
+        if (data.typing === false) {
           setTypingUser(null);
-        }, 3000);
+        } else {
+          setTypingUser(data.username);
+          // Fallback in case the stop frame is lost; the server repeats the start frame while typing
+          typingTimeoutRef.current = setTimeout(() => {
+            setTypingUser(null);
+          }, 6000);
+        }
       }
     }
   };
@@ -243,6 +265,19 @@ useEffect(() => {
     }
   };
 
+  const loadOlderMessages = async () => {
+    try {
+      const res = await axios.get(
+        `http://localhost:8000/private-chat/${senderId}/${receiverId}`,
+        { params: { before: olderCursor }, withCredentials: true }
+      );
+      setMessages((prev) => [...res.data, ...prev]);
+      setOlderCursor(res.headers["x-next-cursor"] || null);
+    } catch (error) {
+      console.error("❌ Greška kod dohvata starijih poruka:", error);
+    }
+  };
+
   let lastDate = null;
 
   return (
@@ -261,6 +296,16 @@ useEffect(() => {
           borderRadius: 2,
         }}
       >
+        {olderCursor && (
+          <Button
+            size="small"
+            onClick={loadOlderMessages}
+            sx={{ display: "block", mx: "auto", mb: 1, color: colors.textDark }}
+          >
+            Load older messages
+          </Button>
+        )}
+
         {messages.map((msg, index) => {
           const isMine = msg.sender_id === senderId;
           const showDate = formatDate(msg.timestamp) !== lastDate;
@@ -66,18 +66,25 @@ const linkify = (text) => {
   });
 };
 
+// History comes in pages with each author listed once; attach the author to every message
+const withAuthors = (page) =>
+  page.messages.map((msg) => ({ ...page.users[msg.user_id], ...msg }));
+
 const StudentCornerChat = ({ username }) => {
   const [messages, setMessages] = useState([]);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [hasOlder, setHasOlder] = useState(false);
   const [input, setInput] = useState("");
-  const [typingUsers, setTypingUsers] = useState({});
+  const [typingUsers, setTypingUsers] = useState([]);
   const [anchorEl, setAnchorEl] = useState(null);
-  const [selectedTimestamp, setSelectedTimestamp] = useState(null);
-  const [editingTimestamp, setEditingTimestamp] = useState(null);
+  const [selectedId, setSelectedId] = useState(null);
+  const [editingId, setEditingId] = useState(null);
   const [editInput, setEditInput] = useState("");
   const [showEmoji, setShowEmoji] = useState(false);
   const [emojiAnchor, setEmojiAnchor] = useState(null);
 
   const ws = useRef(null);
+  const lastTypingSent = useRef(0);
   const chatEndRef = useRef(null);
   const emojiBtnRef = useRef(null);
   const navigate = useNavigate();
@@ -89,31 +96,35 @@ const StudentCornerChat = ({ username }) => {
   };
 
   const handleTyping = () => {
+    // The server keeps typing state for a few seconds, so one event per second is enough
+    const now = Date.now();
+    if (now - lastTypingSent.current < 1000) return;
     if (ws.current && ws.current.readyState === WebSocket.OPEN) {
       ws.current.send(JSON.stringify({ type: "typing", username }));
+      lastTypingSent.current = now;
     }
   };
 
-  const handleMenuClick = (event, timestamp) => {
+  const handleMenuClick = (event, id) => {
     setAnchorEl(event.currentTarget);
-    setSelectedTimestamp(timestamp);
+    setSelectedId(id);
   };
 
   const handleMenuClose = () => {
     setAnchorEl(null);
-    setSelectedTimestamp(null);
+    setSelectedId(null);
   };
 
   const handleDelete = async () => {
     try {
       await axios.delete(
-        `http://localhost:8000/chat/messages/${selectedTimestamp}`,
+        `http://localhost:8000/chat/messages/${selectedId}`,
         {
           params: { username },
         }
       );
       setMessages((prev) =>
-        prev.filter((msg) => msg.timestamp !== selectedTimestamp)
+        prev.filter((msg) => msg.id !== selectedId)
       );
       handleMenuClose();
     } catch (error) {
@@ -124,24 +135,39 @@ const StudentCornerChat = ({ username }) => {
   const handleEditSubmit = async () => {
     try {
       await axios.put(
-        `http://localhost:8000/chat/messages/${editingTimestamp}`,
+        `http://localhost:8000/chat/messages/${editingId}`,
         {
           username,
           new_content: editInput,
         }
       );
-      setEditingTimestamp(null);
+      setEditingId(null);
       setEditInput("");
     } catch (error) {
       console.error("Error editing message:", error);
     }
   };
 
+  const loadOlderMessages = async () => {
+    try {
+      const response = await axios.get("http://localhost:8000/chat/messages", {
+        params: { before: olderCursor },
+      });
+      setMessages((prev) => [...withAuthors(response.data), ...prev]);
+      setOlderCursor(response.data.before_cursor);
+      setHasOlder(response.data.has_more);
+    } catch (error) {
+      console.error("Error fetching older messages:", error);
+    }
+  };
+
   useEffect(() => {
     axios
       .get("http://localhost:8000/chat/messages")
       .then((response) => {
-        setMessages(response.data);
+        setMessages(withAuthors(response.data));
+        setOlderCursor(response.data.before_cursor);
+        setHasOlder(response.data.has_more);
         scrollToBottom();
       })
       .catch((error) => {
@@ -153,8 +179,14 @@ const StudentCornerChat = ({ username }) => {
     ws.current.onmessage = (event) => {
       const data = JSON.parse(event.data);
 
-      if (data.type === "typing" && data.username !== username) {
-        setTypingUsers((prev) => ({ ...prev, [data.username]: Date.now() }));
+      // Heartbeat: the server closes sockets that stop answering
+      if (data.type === "ping") {
+        ws.current.send(JSON.stringify({ type: "pong" }));
+        return;
+      }
+
+      if (data.type === "typing_state") {
+        setTypingUsers(data.usernames.filter((name) => name !== username));
       }
 
       if (data.type === "message") {
@@ -164,14 +196,14 @@ const StudentCornerChat = ({ username }) => {
 
       if (data.type === "delete") {
         setMessages((prev) =>
-          prev.filter((msg) => msg.timestamp !== data.timestamp)
+          prev.filter((msg) => msg.id !== data.id)
         );
       }
 
       if (data.type === "edit") {
         setMessages((prev) =>
           prev.map((msg) =>
-            msg.timestamp === data.timestamp
+            msg.id === data.id
               ? { ...msg, content: data.new_content }
               : msg
           )
@@ -184,24 +216,12 @@ const StudentCornerChat = ({ username }) => {
     };
   }, []);
 
-  useEffect(() => {
-    const interval = setInterval(() => {
-      const now = Date.now();
-      setTypingUsers((prev) =>
-        Object.fromEntries(
-          Object.entries(prev).filter(([_, ts]) => now - ts < 3000)
-        )
-      );
-    }, 1000);
-
-    return () => clearInterval(interval);
-  }, []);
-
   const sendMessage = () => {
     if (input.trim() && ws.current.readyState === WebSocket.OPEN) {
       ws.current.send(
         JSON.stringify({ type: "message", username, content: input })
       );
+      lastTypingSent.current = 0;
       setInput("");
       setShowEmoji(false);
     }
@@ -249,6 +269,16 @@ const StudentCornerChat = ({ username }) => {
           flexDirection: "column",
         }}
       >
+        {hasOlder && (
+          <Button
+            size="small"
+            onClick={loadOlderMessages}
+            sx={{ alignSelf: "center", mb: 1, color: colors.textDark }}
+          >
+            Load older messages
+          </Button>
+        )}
+
         {messages.map((msg, index) => {
           const isMine = msg.username === username;
           const initials =
@@ -261,7 +291,7 @@ const StudentCornerChat = ({ username }) => {
           lastDate = currentDate;
 
           return (
-            <React.Fragment key={index}>
+            <React.Fragment key={msg.id}>
               {showDate && (
                 <Box sx={{ display: "flex", justifyContent: "center", my: 1 }}>
                   <Divider sx={{ flex: 1, mr: 1 }} />
@@ -319,7 +349,7 @@ const StudentCornerChat = ({ username }) => {
                   <Typography variant="subtitle2">
                     {msg.username} ({formatTime(msg.timestamp)})
                   </Typography>
-                  {editingTimestamp === msg.timestamp ? (
+                  {editingId === msg.id ? (
                     <Box>
                       <TextField
                         value={editInput}
@@ -340,7 +370,7 @@ const StudentCornerChat = ({ username }) => {
                           variant="outlined"
                           size="small"
                           onClick={() => {
-                            setEditingTimestamp(null);
+                            setEditingId(null);
                             setEditInput("");
                           }}
                         >
@@ -358,7 +388,7 @@ const StudentCornerChat = ({ username }) => {
                 {isMine && (
                   <IconButton
                     size="small"
-                    onClick={(e) => handleMenuClick(e, msg.timestamp)}
+                    onClick={(e) => handleMenuClick(e, msg.id)}
                     sx={{ alignSelf: "flex-start" }}
                   >
                     <MoreVertIcon fontSize="small" />
@@ -369,14 +399,13 @@ const StudentCornerChat = ({ username }) => {
           );
         })}
 
-        {Object.keys(typingUsers).length > 0 && (
+        {typingUsers.length > 0 && (
           <Typography
             variant="body2"
             sx={{ fontStyle: "italic", color: colors.textDark, mt: 1 }}
           >
-            {Object.keys(typingUsers)[0]} is typing
-            {Object.keys(typingUsers).length > 1 &&
-              ` + ${Object.keys(typingUsers).length - 1} more...`}
+            {typingUsers[0]} is typing
+            {typingUsers.length > 1 && ` + ${typingUsers.length - 1} more...`}
           </Typography>
         )}
 
@@ -449,9 +478,9 @@ const StudentCornerChat = ({ username }) => {
       >
         <MenuItem
           onClick={() => {
-            const msg = messages.find((m) => m.timestamp === selectedTimestamp);
+            const msg = messages.find((m) => m.id === selectedId);
             setEditInput(msg?.content?.replace(" (edited)", "") || "");
-            setEditingTimestamp(selectedTimestamp);
+            setEditingId(selectedId);
             handleMenuClose();
           }}
         >
@@ -0,0 +1,32 @@
+const API_BASE_URL = 'http://localhost:8000';
+
+// Book lists are paged; the next page's cursor comes in the X-Next-Cursor header
+export const PAGE_SIZE = 24;
+
+async function fetchBookPage(path, params, cursor, options = {}) {
+  const pageParams = new URLSearchParams(params);
+  pageParams.set('limit', PAGE_SIZE);
+  if (cursor) pageParams.set('cursor', cursor);
+
+  const response = await fetch(`${API_BASE_URL}${path}?${pageParams}`, options);
+  if (!response.ok) {
+    throw new Error(`Error ${response.status}: Unable to fetch books.`);
+  }
+
+  return {
+    books: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  };
+}
+
+// One page of the catalog; pass the returned nextCursor to get the next one
+export function fetchBooksPage(params = new URLSearchParams(), cursor = null) {
+  return fetchBookPage('/books/', params, cursor);
+}
+
+// One page of the logged-in user's favourite books, same filters as the catalog
+export function fetchFavouriteBooksPage(params = new URLSearchParams(), cursor = null) {
+  return fetchBookPage('/books/favourites/books', params, cursor, {
+    credentials: 'include',
+  });
+}